@@ -0,0 +1,283 @@
+"""Synthetic-scale benchmark for the ocr.py extraction pipeline.
+
+Generates realistic Oracle Vision results from the layouts of the sample files in json/, then
+times loading, page indexing, every extract_* function and process_json_files_in_folder end to
+end. Each stage runs in a fresh process so its peak RSS can be reported, and the results are
+written as JSON with throughput in documents per second.
+
+    python benchmarks/bench_ocr.py --docs 10000 --workers 1 4 --output bench.json
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import glob
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import ocr  # noqa: E402
+import ocr_pack  # noqa: E402
+
+# Whole-page and per-line jitter applied to the sample coordinates
+PAGE_JITTER = 0.002
+LINE_JITTER = 0.0005
+
+# Number of distinct synthetic pages kept in memory for the extractor-only stages
+EXTRACTOR_POOL_SIZE = 500
+
+# Pages classified together by the extract_bio_batch stage
+BIO_BATCH_SIZE = 1000
+
+def load_layouts(sample_dir):
+    """Loads the first page of every sample OCR result to use as a layout template."""
+    layouts = []
+    for file_path in sorted(glob.glob(os.path.join(sample_dir, "*.json"))):
+        layouts.append(ocr.load_json_data(file_path)["pages"][0])
+    if not layouts:
+        raise SystemExit(f"No sample OCR results found in {sample_dir}")
+    return layouts
+
+def _jitter_vertices(vertices, dx, dy, rng):
+    """Returns the vertices shifted by (dx, dy) plus a little per-line noise."""
+    nx = rng.uniform(-LINE_JITTER, LINE_JITTER)
+    ny = rng.uniform(-LINE_JITTER, LINE_JITTER)
+    return [{"x": v["x"] + dx + nx, "y": v["y"] + dy + ny} for v in vertices]
+
+def _word_boxes(text, vertices):
+    """Splits a line box into one box per word, proportional to the word lengths."""
+    words = text.split() or [text]
+    left, right = vertices[0]["x"], vertices[1]["x"]
+    top, bottom = vertices[0]["y"], vertices[2]["y"]
+    total = sum(len(word) for word in words) + len(words) - 1
+    boxes = []
+    position = 0
+    for word in words:
+        x_start = left + (right - left) * position / total
+        x_end = left + (right - left) * (position + len(word)) / total
+        boxes.append((word, [{"x": x_start, "y": top}, {"x": x_end, "y": top}, {"x": x_end, "y": bottom}, {"x": x_start, "y": bottom}]))
+        position += len(word) + 1
+    return boxes
+
+def synthesize_document(layout, rng):
+    """Builds one synthetic OCR result from a layout page.
+
+    Line text and positions follow the layout, ratings are re-rolled, coordinates are jittered
+    and a "words" array, confidences and metadata are generated so the file has the same shape
+    and roughly the same size as a real Oracle Vision response.
+    """
+    dx = rng.uniform(-PAGE_JITTER, PAGE_JITTER)
+    dy = rng.uniform(-PAGE_JITTER, PAGE_JITTER)
+
+    words = []
+    lines = []
+    for line in layout["lines"]:
+        text = line["text"]
+        if text.isdigit() and len(text) == 2:
+            text = str(rng.randint(40, 99))
+
+        vertices = _jitter_vertices(line["boundingPolygon"]["normalizedVertices"], dx, dy, rng)
+
+        word_indexes = []
+        for word, word_vertices in _word_boxes(text, vertices):
+            word_indexes.append(len(words))
+            words.append({"text": word, "confidence": rng.uniform(0.85, 1.0), "boundingPolygon": {"normalizedVertices": word_vertices}})
+
+        lines.append({
+            "text": text,
+            "confidence": rng.uniform(0.85, 1.0),
+            "boundingPolygon": {"normalizedVertices": vertices},
+            "wordIndexes": word_indexes,
+        })
+
+    return {
+        "documentMetadata": {"pageCount": 1, "mimeType": "image/jpeg"},
+        "pages": [{"pageNumber": 1, "dimensions": layout["dimensions"], "words": words, "lines": lines}],
+        "textExtractionModelVersion": "1.13.39",
+    }
+
+def iter_synthetic_documents(layouts, count, seed=0):
+    """Yields count synthetic OCR results, cycling through the layouts."""
+    rng = random.Random(seed)
+    for layout in itertools.islice(itertools.cycle(layouts), count):
+        yield synthesize_document(layout, rng)
+
+def write_corpus(layouts, count, folder, seed=0):
+    """Writes count synthetic OCR results into folder as pretty-printed JSON files."""
+    for i, document in enumerate(iter_synthetic_documents(layouts, count, seed)):
+        with open(os.path.join(folder, f"synthetic{i:06d}.json"), "w") as f:
+            json.dump(document, f, indent=2)
+
+def _corpus_files(folder):
+    return sorted(glob.glob(os.path.join(folder, "*.json")))
+
+def _extractor_pool(layouts, seed):
+    """Returns EXTRACTOR_POOL_SIZE synthetic page indexes for the in-memory stages."""
+    return [ocr.build_page_index(document["pages"][0]) for document in iter_synthetic_documents(layouts, EXTRACTOR_POOL_SIZE, seed)]
+
+def _stage_load(folder, docs, loader):
+    for file_path in _corpus_files(folder):
+        loader(file_path)
+    return docs
+
+def _stage_pack(folder, docs):
+    pack_dir = tempfile.mkdtemp()
+    try:
+        ocr_pack.pack_folder(folder, os.path.join(pack_dir, "corpus.pack"))
+    finally:
+        shutil.rmtree(pack_dir)
+    return docs
+
+def _stage_load_pack(folder, docs):
+    pack_dir = tempfile.mkdtemp()
+    try:
+        pack_path = os.path.join(pack_dir, "corpus.pack")
+        ocr_pack.pack_folder(folder, pack_path)
+        start = time.perf_counter()
+        with ocr_pack.PackReader(pack_path) as reader:
+            for _ in reader.iter_documents():
+                pass
+        return time.perf_counter() - start
+    finally:
+        shutil.rmtree(pack_dir)
+
+def _stage_extract(layouts, docs, seed, extractor):
+    pool = _extractor_pool(layouts, seed)
+    start = time.perf_counter()
+    for index in itertools.islice(itertools.cycle(pool), docs):
+        extractor(index)
+    return time.perf_counter() - start
+
+def _stage_bio_batch(layouts, docs, seed):
+    pool = _extractor_pool(layouts, seed)
+    start = time.perf_counter()
+    remaining = docs
+    while remaining > 0:
+        batch = [pool[i % len(pool)] for i in range(min(BIO_BATCH_SIZE, remaining))]
+        ocr.extract_bio_batch(batch)
+        remaining -= len(batch)
+    return time.perf_counter() - start
+
+def _stage_end_to_end(folder, docs, workers):
+    output_path = os.path.join(tempfile.mkdtemp(), "player_data.csv")
+    with contextlib.redirect_stdout(io.StringIO()):
+        ocr.process_json_files_in_folder(folder, output_path=output_path, workers=workers)
+    shutil.rmtree(os.path.dirname(output_path))
+    return docs
+
+def _run_stage(stage, args):
+    """Runs one stage in the current (fresh) process and returns its wall time and peak RSS in KiB.
+
+    In-memory stages return their own timing so building the synthetic pages is not counted.
+    """
+    start = time.perf_counter()
+    timed = stage(*args)
+    elapsed = time.perf_counter() - start
+    if isinstance(timed, float):
+        elapsed = timed
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children_rss = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return elapsed, max(peak_rss, children_rss)
+
+def build_stages(folder, layouts, docs, seed, workers):
+    """Returns (name, function, args) for every benchmark stage."""
+    stages = [
+        ("load_json_data", _stage_load, (folder, docs, ocr.load_json_data)),
+        ("load_lean_json_data", _stage_load, (folder, docs, ocr.load_lean_json_data)),
+        ("load_page_indexes", _stage_load, (folder, docs, ocr.load_page_indexes)),
+        ("ocr_pack.pack_folder", _stage_pack, (folder, docs)),
+        ("load_pack", _stage_load_pack, (folder, docs)),
+        ("extract_bio", _stage_extract, (layouts, docs, seed, ocr.extract_bio)),
+        ("extract_bio_batch", _stage_bio_batch, (layouts, docs, seed)),
+        ("extract_abilities", _stage_extract, (layouts, docs, seed, ocr.extract_abilities)),
+        ("extract_attributes", _stage_extract, (layouts, docs, seed, ocr.extract_attributes)),
+        ("extract_dev_trait", _stage_extract, (layouts, docs, seed, ocr.extract_dev_trait)),
+        ("extract_mentals", _stage_extract, (layouts, docs, seed, ocr.extract_mentals)),
+    ]
+    for count in workers:
+        stages.append((f"process_json_files_in_folder[workers={count}]", _stage_end_to_end, (folder, docs, count)))
+    return stages
+
+def run_benchmarks(docs, workers=(1,), sample_dir=None, corpus_dir=None, seed=0, only=None):
+    """Generates the synthetic corpus, runs every stage in a fresh process and returns the results dict."""
+    layouts = load_layouts(sample_dir or os.path.join(REPO_ROOT, "json"))
+
+    cleanup = corpus_dir is None
+    folder = corpus_dir or tempfile.mkdtemp(prefix="cfb25-bench-")
+    os.makedirs(folder, exist_ok=True)
+
+    try:
+        # Reuse an existing corpus of the right size (e.g. from a previous --corpus run)
+        generate_seconds = None
+        if len(_corpus_files(folder)) != docs:
+            for file_path in _corpus_files(folder):
+                os.remove(file_path)
+            start = time.perf_counter()
+            write_corpus(layouts, docs, folder, seed)
+            generate_seconds = time.perf_counter() - start
+
+        corpus_bytes = sum(os.path.getsize(file_path) for file_path in _corpus_files(folder))
+
+        results = []
+        context = multiprocessing.get_context("spawn")
+        for name, stage, args in build_stages(folder, layouts, docs, seed, workers):
+            if only and not any(pattern in name for pattern in only):
+                continue
+            with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                seconds, peak_rss_kb = executor.submit(_run_stage, stage, args).result()
+            results.append({
+                "stage": name,
+                "docs": docs,
+                "seconds": round(seconds, 6),
+                "docs_per_sec": round(docs / seconds, 1) if seconds > 0 else None,
+                "peak_rss_kb": peak_rss_kb,
+            })
+            print(f"{name}: {seconds:.3f}s, {results[-1]['docs_per_sec']} docs/sec, peak RSS {peak_rss_kb} KiB", file=sys.stderr)
+    finally:
+        if cleanup:
+            shutil.rmtree(folder, ignore_errors=True)
+
+    return {
+        "docs": docs,
+        "corpus_bytes": corpus_bytes,
+        "generate_seconds": round(generate_seconds, 3) if generate_seconds is not None else None,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": ocr.np is not None,
+        "orjson": ocr.orjson is not None,
+        "seed": seed,
+        "results": results,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the ocr.py pipeline on synthetic Oracle Vision results.")
+    parser.add_argument("--docs", type=int, default=1000, help="number of synthetic documents (default: 1000; use 10000-100000 for scale runs)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1], help="worker counts for the end-to-end stage (default: 1)")
+    parser.add_argument("--samples", help="folder of sample OCR results used as layouts (default: json/)")
+    parser.add_argument("--corpus", help="keep the generated corpus in this folder and reuse it on later runs")
+    parser.add_argument("--seed", type=int, default=0, help="random seed for the generator (default: 0)")
+    parser.add_argument("--only", nargs="+", help="only run stages whose name contains one of these strings")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.docs, args.workers, args.samples, args.corpus, args.seed, args.only)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
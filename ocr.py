@@ -1,7 +1,62 @@
+import argparse
+import bisect
+import concurrent.futures
+import contextlib
+import cProfile
 import json
 import os
 import csv
+import functools
+import hashlib
+import heapq
+import io
+import itertools
+import re
 import sys
+import tempfile
+import time
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, extract_bio falls back to plain Python comparisons
+    np = None
+
+# orjson is an optional, much faster JSON decoder used by load_lean_json_data
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# ijson is optional and streams large multi-page results straight from the file
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Raised for a malformed OCR result by whichever decoder read it (a file that is not UTF-8
+# fails before it reaches the decoder)
+JSON_DECODE_ERRORS = (json.JSONDecodeError, UnicodeDecodeError) + ((ijson.JSONError,) if ijson is not None else ())
+
+# Columns written ahead of the attribute columns in player_data.csv
+BASE_FIELDNAMES = ['Name', 'Position', 'Class', 'Hometown', 'State', 'Height & Weight', 'Tendency', 'star_rating', 'overall_rating', 'development_trait', 'abilities', 'mentals']
+
+# Bumped whenever the cached rows in an incremental-run manifest change shape
+MANIFEST_VERSION = 2
+
+# Largest horizontal and vertical distance between an attribute label and its value for the spatial matcher
+ATTRIBUTE_VALUE_MAX_DX = 0.1
+ATTRIBUTE_VALUE_MAX_DY = 0.05
+
+# Extracted rows are held in memory up to this many bytes before spilling to a temp file
+ROW_SPOOL_MAX_SIZE = 32 * 1024 * 1024
+
+# OCR results at least this large (batch jobs with many screenshots as pages) are decoded one
+# page at a time; smaller ones are decoded in one go, which is faster
+STREAM_MIN_SIZE = 4 * 1024 * 1024
+
+# Bumped whenever the layout of a shard's partial output changes
+SHARD_VERSION = 2
 
 def load_json_data(file_path):
     """Loads JSON data from the specified file path."""
@@ -9,104 +64,391 @@ def load_json_data(file_path):
         data = json.load(f)
     return data
 
-def extract_abilities(data):
-  """Extracts the "Abilities" and their values from the JSON data."""
+def _lean_page(page):
+    """Returns a copy of an OCR page holding only the fields the extractors read."""
+    return {
+        "pageNumber": page.get("pageNumber"),
+        "dimensions": page.get("dimensions"),
+        "lines": [
+            {"text": line["text"], "boundingPolygon": {"normalizedVertices": line["boundingPolygon"]["normalizedVertices"]}}
+            for line in page["lines"]
+        ],
+    }
+
+def decode_lean_json_data(raw):
+    """Decodes the bytes (or text) of an OCR result, keeping only the fields the extractors use.
+
+    Uses orjson when it is installed and the standard json module otherwise; both raise
+    json.JSONDecodeError on invalid input.
+    """
+    data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    return {"pages": [_lean_page(page) for page in data["pages"]]}
+
+def load_lean_json_data(file_path):
+    """Loads only the parts of an OCR result the extractors use: page numbers, dimensions and line text/boxes.
+
+    The "words" array, confidences, wordIndexes and documentMetadata (most of each file) are
+    dropped straight after decoding so they are not kept alive while the page is extracted.
+    The file's bytes are freed once they are turned into text, so the peak while decoding is
+    the text plus the fully decoded result, the same as json.load; only what is kept
+    afterwards is smaller.
+    """
+    with open(file_path, "rb") as f:
+        return decode_lean_json_data(f.read().decode("utf-8"))
+
+_JSON_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+def _iter_pages_stdlib(raw):
+    """Yields the page dicts of an OCR result one at a time with the standard json module.
+
+    Only the top-level object and the "pages" array are walked by hand; every page (and every
+    other top-level value) is decoded on its own with raw_decode, so at most one decoded page
+    is alive at a time.
+    """
+    text = raw.decode("utf-8") if isinstance(raw, (bytes, bytearray)) else raw
+    decoder = json.JSONDecoder()
+
+    def skip(position):
+        return _JSON_WHITESPACE.match(text, position).end()
+
+    def expect(position, characters):
+        position = skip(position)
+        if position >= len(text) or text[position] not in characters:
+            raise json.JSONDecodeError(f"Expecting one of {characters!r}", text, position)
+        return position
+
+    position = expect(0, "{") + 1
+    if text[skip(position):skip(position) + 1] == "}":
+        return
+
+    while True:
+        key, position = decoder.raw_decode(text, expect(position, '"'))
+        position = expect(position, ":") + 1
+
+        if key == "pages":
+            position = expect(position, "[") + 1
+            if text[skip(position):skip(position) + 1] == "]":
+                position = skip(position) + 1
+            else:
+                while True:
+                    page, position = decoder.raw_decode(text, skip(position))
+                    yield page
+                    position = expect(position, ",]")
+                    position += 1
+                    if text[position - 1] == "]":
+                        break
+        else:
+            _, position = decoder.raw_decode(text, skip(position))
+
+        position = expect(position, ",}") + 1
+        if text[position - 1] == "}":
+            return
+
+def iter_json_pages(raw):
+    """Yields the lean pages (see _lean_page) of an OCR result's bytes, one page at a time.
+
+    Results under STREAM_MIN_SIZE bytes are decoded in one go. Larger ones are streamed with
+    ijson when it is installed, or split page by page with the standard json module.
+    """
+    if len(raw) < STREAM_MIN_SIZE:
+        yield from decode_lean_json_data(raw)["pages"]
+        return
+
+    pages = ijson.items(io.BytesIO(raw), "pages.item", use_float=True) if ijson is not None else _iter_pages_stdlib(raw)
+    for page in pages:
+        yield _lean_page(page)
+
+def iter_json_file_pages(file_path):
+    """Yields the lean pages of an OCR result file, one page at a time.
 
-  # Get 'pages' data
-  pages = data["pages"]
+    With ijson installed, a large file is parsed straight from disk and never held in memory
+    as a whole; see iter_json_pages otherwise.
+    """
+    if ijson is not None and os.path.getsize(file_path) >= STREAM_MIN_SIZE:
+        with open(file_path, "rb") as f:
+            for page in ijson.items(f, "pages.item", use_float=True):
+                yield _lean_page(page)
+        return
+
+    with open(file_path, "rb") as f:
+        raw = f.read()
+    yield from iter_json_pages(raw)
+
+class PageIndex:
+    """Compact struct-of-arrays view of one OCR page, built once and shared by every extractor.
+
+    Line text is kept in a list and each coordinate in a flat array of doubles, indexed by line
+    position. x0..x3 are the x coordinates of the four polygon vertices in OCR order, y0 and y2
+    the y coordinates of the first and third vertex, cx the center of the top edge and cy the
+    center between the first and third vertex. anchors maps line text to its ascending line
+    positions and by_y lists line positions from the top of the screen to the bottom. layout is
+    the CompiledLayout selected for the page, set on first use by page_layout.
+    """
+
+    __slots__ = ("page_number", "dimensions", "text", "anchors", "x0", "x1", "x2", "x3", "y0", "y2", "cx", "cy", "by_y", "layout")
+
+    def __init__(self, page_number=None, dimensions=None):
+        self.page_number = page_number
+        self.dimensions = dimensions
+        self.text = []
+        self.anchors = {}
+        self.x0, self.x1, self.x2, self.x3 = array("d"), array("d"), array("d"), array("d")
+        self.y0, self.y2 = array("d"), array("d")
+        self.cx, self.cy = array("d"), array("d")
+        self.by_y = array("l")
+        self.layout = None
+
+    def __len__(self):
+        return len(self.text)
+
+    def add_line(self, text, x0, y0, x1, x2, y2, x3):
+        """Appends one line given its text and the vertex coordinates the extractors use."""
+        self.anchors.setdefault(text, []).append(len(self.text))
+        self.text.append(text)
+        self.x0.append(x0)
+        self.x1.append(x1)
+        self.x2.append(x2)
+        self.x3.append(x3)
+        self.y0.append(y0)
+        self.y2.append(y2)
+        self.cx.append((x0 + x1) / 2)
+        self.cy.append((y0 + y2) / 2)
+
+    def finish(self):
+        """Computes the top-to-bottom line order once every line has been added."""
+        self.by_y = array("l", sorted(range(len(self.text)), key=self.cy.__getitem__))
+        return self
+
+def build_page_index(page):
+    """Builds the PageIndex of a single OCR page dict.
+
+    The nested normalizedVertices dicts are read exactly once here, so the extractors never have
+    to rescan the lines; every check on the index gives the same result as reading the polygon.
+    """
+    index = PageIndex(page.get("pageNumber"), page.get("dimensions"))
+
+    for line in page["lines"]:
+        vertices = line["boundingPolygon"]["normalizedVertices"]
+        index.add_line(
+            line["text"],
+            vertices[0]["x"], vertices[0]["y"],
+            vertices[1]["x"],
+            vertices[2]["x"], vertices[2]["y"],
+            vertices[3]["x"],
+        )
+
+    return index.finish()
+
+def load_page_indexes(file_path):
+    """Loads an OCR result and converts each of its pages into a PageIndex."""
+    return [build_page_index(page) for page in load_lean_json_data(file_path)["pages"]]
+
+def get_page_index(data, index=None):
+    """Returns the page index to extract from.
+
+    data may be a PageIndex or a raw OCR result, in which case its first page is indexed
+    unless a prebuilt index is passed in. To extract from the other pages of a multi-page
+    result, pass each page's PageIndex (see iter_json_pages and build_page_index).
+    """
+    if index is not None:
+        return index
+    if isinstance(data, PageIndex):
+        return data
+    return build_page_index(data["pages"][0])
+
+def _first_anchor_after(index, text, position):
+    """Returns the position of the first line with the given text after position, or None."""
+    positions = index.anchors.get(text, [])
+    k = bisect.bisect_right(positions, position)
+    return positions[k] if k < len(positions) else None
+
+def _last_anchor_before(index, text, position):
+    """Returns the position of the last line with the given text before position, or None."""
+    positions = index.anchors.get(text, [])
+    k = bisect.bisect_left(positions, position)
+    return positions[k - 1] if k > 0 else None
+
+def _last_anchor(index, text):
+    """Returns the position of the last line with the given text, or None."""
+    positions = index.anchors.get(text)
+    return positions[-1] if positions else None
+
+def _section_after_first(index, start_text, end_text):
+    """Returns the (start, end) line positions of a section that ends at the first end_text following start_text.
+
+    Mirrors a top-to-bottom scan that remembers the latest start_text and stops at the first
+    end_text seen once a start_text has been found. Returns (None, None) if either anchor is missing.
+    """
+    starts = index.anchors.get(start_text)
+    if not starts:
+        return None, None
+
+    end_index = _first_anchor_after(index, end_text, starts[0])
+    if end_index is None:
+        return None, None
+
+    return _last_anchor_before(index, start_text, end_index), end_index
+
+def _section_between_last(index, start_text, end_text):
+    """Returns the (start, end) line positions between the last start_text and the last end_text.
+
+    Returns (None, None) if either anchor is missing or they are out of order.
+    """
+    start_index = _last_anchor(index, start_text)
+    end_index = _last_anchor(index, end_text)
+    if start_index is None or end_index is None or end_index <= start_index:
+        return None, None
+    return start_index, end_index
+
+# How each section extractor finds its lines: start anchor, end anchor and the locator used
+SECTION_ANCHORS = {
+    "extract_abilities": ("Abilities", "@ Select Prospect", _section_after_first),
+    "extract_attributes": ("Attributes", "@ Select Prospect", _section_between_last),
+    "extract_dev_trait": ("Development Trait", "@ Select Prospect", _section_between_last),
+    "extract_mentals": ("Mentals", "Development Trait", _section_after_first),
+}
+
+def find_section(index, extractor):
+    """Returns the (start, end) line positions of an extractor's section, or (None, None) if its anchors are missing."""
+    start_text, end_text, locate = SECTION_ANCHORS[extractor]
+    return locate(index, start_text, end_text)
+
+def extract_abilities(data, index=None):
+  """Extracts the "Abilities" and their values from the JSON data."""
 
-  # Initialize start and end indices
-  start_index = None
-  end_index = None
+  index = get_page_index(data, index)
+  text = index.text
+  x0, x1, cy = index.x0, index.x1, index.cy
 
   # Find start and end indices
-  for i, line in enumerate(pages[0]["lines"]):
-      if line["text"] == "Abilities":
-          start_index = i
-      # Start searching for end_index only after start_index is found
-      elif start_index is not None and line["text"] == "@ Select Prospect":
-          end_index = i
-          break  # Stop searching once found
+  start_index, end_index = find_section(index, "extract_abilities")
 
   extracted_matches = {}
 
   # Slice the lines if both indices are found
   if start_index is not None and end_index is not None:
-      sliced_lines = pages[0]["lines"][start_index:end_index]
-
       # Initialize left_boundary and right_boundary with the x-coordinates of the "Abilities" line
-      left_boundary = sliced_lines[0]["boundingPolygon"]["normalizedVertices"][0]["x"]
-      right_boundary = sliced_lines[0]["boundingPolygon"]["normalizedVertices"][1]["x"]
+      left_boundary = x0[start_index]
+      right_boundary = x1[start_index]
 
       # Find the line with "Attributes" to potentially update the left boundary
-      for line in sliced_lines:
-          if line["text"] == "Attributes":
-              left_boundary = min(left_boundary, line["boundingPolygon"]["normalizedVertices"][0]["x"])
-              break  # Stop searching once found
+      attributes_index = _first_anchor_after(index, "Attributes", start_index)
+      if attributes_index is not None and attributes_index < end_index:
+          left_boundary = min(left_boundary, x0[attributes_index])
 
       # Get the center y coordinate of the line containing "Abilities"
-      abilities_center_y = (sliced_lines[0]["boundingPolygon"]["normalizedVertices"][0]["y"] + 
-                            sliced_lines[0]["boundingPolygon"]["normalizedVertices"][2]["y"]) / 2
-
-      # Get the center y coordinate of the line containing "@ Select Prospect"
-      select_prospect_center_y = (sliced_lines[-1]["boundingPolygon"]["normalizedVertices"][0]["y"] + 
-                                  sliced_lines[-1]["boundingPolygon"]["normalizedVertices"][2]["y"]) / 2
+      abilities_center_y = cy[start_index]
 
-      # Define vertical tolerance
-      vertical_tolerance = 0.05  # Increased tolerance
+      # Get the center y coordinate of the last line before "@ Select Prospect"
+      select_prospect_center_y = cy[end_index - 1]
 
       # Filter lines based on conditions
       filtered_lines = [
-          line
-          for line in sliced_lines
+          i
+          for i in range(start_index, end_index)
           if (
               # Check if the line's x-coordinates fall within the range of "Abilities" with some tolerance
-              left_boundary - 0.05 <= line["boundingPolygon"]["normalizedVertices"][0]["x"]
-              and line["boundingPolygon"]["normalizedVertices"][1]["x"] <= right_boundary + 0.05
+              left_boundary - 0.05 <= x0[i]
+              and x1[i] <= right_boundary + 0.05
               # Check if line is below or equal to "Abilities" and above "@ Select Prospect"
-              and (line["boundingPolygon"]["normalizedVertices"][0]["y"] + 
-                   line["boundingPolygon"]["normalizedVertices"][2]["y"]) / 2 >= abilities_center_y
-              and (line["boundingPolygon"]["normalizedVertices"][0]["y"] + 
-                   line["boundingPolygon"]["normalizedVertices"][2]["y"]) / 2 < select_prospect_center_y
+              and abilities_center_y <= cy[i] < select_prospect_center_y
               # Exclude "Abilities" and "Mentals"
-              and line["text"] not in ["Abilities", "Mentals"]
+              and text[i] not in ["Abilities", "Mentals"]
           )
       ]
 
       # Extract abilities as a single string
-      extracted_matches["Abilities"] = ", ".join([line["text"] for line in filtered_lines])
+      extracted_matches["Abilities"] = ", ".join([text[i] for i in filtered_lines])
 
   return extracted_matches
 
-def extract_attributes(data):
-    """Extracts key-value pairs from the JSON data based on specific criteria."""
-    # Extract 'pages'
-    pages = data["pages"]
-
-    # Initialize start and end indices
-    start_index = None
-    end_index = None
+def _is_attribute_label(text):
+    """Returns True if a line in the Attributes panel looks like a label rather than a value."""
+    return text.isupper() or text.endswith(":")
+
+def _match_attributes_spatial(index, start_index, end_index):
+    """Pairs each attribute label with the nearest value box below it, independent of OCR line order.
+
+    Value lines between the "Attributes" and "@ Select Prospect" anchors are bucketed into
+    columns max_dx wide and sorted by center y, so each label only bisects its own and the two
+    neighbouring columns for the closest value within max_dy. Both come from the page layout's
+    attribute_value_dx and attribute_value_dy tolerances.
+    """
+    text, x0, cx, cy = index.text, index.x0, index.cx, index.cy
+    tolerances = page_layout(index).tolerances
+    max_dx, max_dy = tolerances["attribute_value_dx"], tolerances["attribute_value_dy"]
+
+    # Lines inside the panel, from the top of the screen down
+    left_boundary = x0[start_index]
+    top, bottom = cy[start_index], cy[end_index]
+    panel = [i for i in index.by_y if x0[i] >= left_boundary and top < cy[i] < bottom and i != start_index]
+
+    labels = []
+    columns = {}
+    for i in panel:
+        if _is_attribute_label(text[i]):
+            labels.append(i)
+        else:
+            columns.setdefault(int(cx[i] // max_dx), []).append(i)
+
+    # by_y is already sorted by center y, so every column is too
+    column_ys = {column: [cy[i] for i in lines] for column, lines in columns.items()}
+
+    attribute_data = {}
+    for label in labels:
+        key = text[label]
+        if key in attribute_data:
+            continue
+
+        best = None
+        column = int(cx[label] // max_dx)
+        for neighbour in (column - 1, column, column + 1):
+            ys = column_ys.get(neighbour)
+            if not ys:
+                continue
+
+            # First value below the label in this column that is also horizontally aligned
+            k = bisect.bisect_right(ys, cy[label])
+            while k < len(ys) and ys[k] - cy[label] <= max_dy:
+                candidate = columns[neighbour][k]
+                if abs(cx[label] - cx[candidate]) < max_dx:
+                    if best is None or cy[candidate] < cy[best]:
+                        best = candidate
+                    break
+                k += 1
+
+        if best is not None:
+            attribute_data[key] = text[best]
+
+    return attribute_data
+
+def extract_attributes(data, index=None, matcher="spatial"):
+    """Extracts key-value pairs from the JSON data based on specific criteria.
+
+    matcher="spatial" pairs each label with the nearest aligned value box below it on screen;
+    matcher="window" pairs it with one of the next three lines in OCR order.
+    """
+    index = get_page_index(data, index)
+    text = index.text
+    x0, cx = index.x0, index.cx
 
     # Find start and end indices
-    for i, line in enumerate(pages[0]["lines"]):
-        if line["text"] == "Attributes":
-            start_index = i
-        elif line["text"] == "@ Select Prospect":
-            end_index = i
+    start_index, end_index = find_section(index, "extract_attributes")
+
+    if start_index is not None and end_index is not None and matcher == "spatial":
+        return _match_attributes_spatial(index, start_index, end_index)
 
     # Slice the lines if both indices are found
     if start_index is not None and end_index is not None:
-        sliced_lines = pages[0]["lines"][start_index:end_index]
-
-        # Get the left boundary
-        left_boundary = sliced_lines[0]["boundingPolygon"]["normalizedVertices"][0]["x"]
+        # Get the left boundary and how far a value may be off-center below its label
+        left_boundary = x0[start_index]
+        max_dx = page_layout(index).tolerances["value_dx"]
 
         # Filter lines based on conditions
         filtered_lines = [
-            line
-            for line in sliced_lines
-            if line["boundingPolygon"]["normalizedVertices"][0]["x"] >= left_boundary
-            and line["text"] != "Attributes"
+            i
+            for i in range(start_index, end_index)
+            if x0[i] >= left_boundary and text[i] != "Attributes"
         ]
 
     #key value matching and output for attributes
@@ -115,221 +457,466 @@ def extract_attributes(data):
 
         # Iterate through the filtered lines
         for i, line in enumerate(filtered_lines):
-            # Check if the current line is a potential key and it has not been matched yet
-            if (line["text"].isupper() or line["text"].endswith(":")) and line["text"] not in attribute_data:
-                # Calculate the center of the current line
-                current_center_x = (
-                    line["boundingPolygon"]["normalizedVertices"][0]["x"]
-                    + line["boundingPolygon"]["normalizedVertices"][1]["x"]
-                ) / 2
+            key = text[line]
 
+            # Check if the current line is a potential key and it has not been matched yet
+            if _is_attribute_label(key) and key not in attribute_data:
                 # Scan a few lines below for potential values
                 for j in range(i + 1, min(i + 4, len(filtered_lines))):
                     next_line = filtered_lines[j]
 
-                    # Calculate the center of the next line
-                    next_center_x = (
-                        next_line["boundingPolygon"]["normalizedVertices"][0]["x"]
-                        + next_line["boundingPolygon"]["normalizedVertices"][1]["x"]
-                    ) / 2
-
                     # Check if the next line is reasonably centered below the current line
-                    if abs(current_center_x - next_center_x) < 0.1:  # Relaxed threshold
-                        attribute_data[line["text"]] = next_line["text"]
+                    if abs(cx[line] - cx[next_line]) < max_dx:  # Relaxed threshold
+                        attribute_data[key] = text[next_line]
                         break  # Stop searching for values once a match is found
         return attribute_data
 
-def extract_dev_trait(data):
+def extract_dev_trait(data, index=None):
   """Extracts the "Development Trait" and its value from the JSON data."""
 
-  # Get 'pages' data
-  pages = data["pages"]
-
-  # Initialize start and end indices
-  start_index = None
-  end_index = None
+  index = get_page_index(data, index)
+  text = index.text
+  x0, cx = index.x0, index.cx
 
   # Find start and end indices
-  for i, line in enumerate(pages[0]["lines"]):
-      if line["text"] == "Development Trait":
-          start_index = i
-      elif line["text"] == "@ Select Prospect":
-          end_index = i
+  start_index, end_index = find_section(index, "extract_dev_trait")
 
   dev_trait = {}
 
   # Slice the lines if both indices are found
   if start_index is not None and end_index is not None:
-      sliced_lines = pages[0]["lines"][start_index:end_index]
-
-      # Get the left boundary
-      left_boundary = sliced_lines[0]["boundingPolygon"]["normalizedVertices"][0]["x"]
+      # Get the left boundary and how far the value may be off-center below the label
+      left_boundary = x0[start_index]
+      max_dx = page_layout(index).tolerances["value_dx"]
 
       # Filter lines based on conditions
-      filtered_lines = [
-          line
-          for line in sliced_lines
-          if line["boundingPolygon"]["normalizedVertices"][0]["x"] >= left_boundary
-          #and line["text"] != "Development Trait"
-      ]
+      filtered_lines = [i for i in range(start_index, end_index) if x0[i] >= left_boundary]
 
       # Iterate through the filtered lines
       for i, line in enumerate(filtered_lines):
           # Check if the current line contains "Development Trait"
-          if line["text"] == "Development Trait":
-              # Calculate the center of the current line
-              current_center_x = (
-                  line["boundingPolygon"]["normalizedVertices"][0]["x"]
-                  + line["boundingPolygon"]["normalizedVertices"][1]["x"]
-              ) / 2
-
+          if text[line] == "Development Trait":
               # Scan a few lines below for potential values
               for j in range(i + 1, min(i + 4, len(filtered_lines))):
                   next_line = filtered_lines[j]
 
-                  # Calculate the center of the next line
-                  next_center_x = (
-                      next_line["boundingPolygon"]["normalizedVertices"][0]["x"]
-                      + next_line["boundingPolygon"]["normalizedVertices"][1]["x"]
-                  ) / 2
-
                   # Check if the next line is reasonably centered below the current line
-                  if abs(current_center_x - next_center_x) < 0.1:  # Relaxed threshold
-                      dev_trait["Development Trait"] = next_line["text"]
+                  if abs(cx[line] - cx[next_line]) < max_dx:  # Relaxed threshold
+                      dev_trait["Development Trait"] = text[next_line]
                       break  # Stop searching for values once a match is found
   return dev_trait
 
-def extract_mentals(data):
+def extract_mentals(data, index=None):
   """Extracts the "Mentals" and their values from the JSON data."""
 
-  # Get 'pages' data
-  pages = data["pages"]
-
-  # Initialize start and end indices
-  start_index = None
-  end_index = None
+  index = get_page_index(data, index)
+  text = index.text
+  cy = index.cy
+  xs = (index.x0, index.x1, index.x2, index.x3)
 
   # Find start and end indices
-  for i, line in enumerate(pages[0]["lines"]):
-      if line["text"] == "Mentals":
-          start_index = i
-      # Start searching for end_index only after start_index is found
-      elif start_index is not None and line["text"] == "Development Trait":
-          end_index = i
-          break  # Stop searching once found
+  start_index, end_index = find_section(index, "extract_mentals")
 
   extracted_matches = {}
 
   # Slice the lines if both indices are found
   if start_index is not None and end_index is not None:
-      sliced_lines = pages[0]["lines"][start_index:end_index]
-
       # Get the center y coordinate of the line containing "Mentals"
-      mentals_center_y = (sliced_lines[0]["boundingPolygon"]["normalizedVertices"][0]["y"] + 
-                          sliced_lines[0]["boundingPolygon"]["normalizedVertices"][2]["y"]) / 2
+      mentals_center_y = cy[start_index]
 
-      # Get the center y coordinate of the line containing "Development Trait"
-      development_trait_center_y = (sliced_lines[-1]["boundingPolygon"]["normalizedVertices"][0]["y"] + 
-                                    sliced_lines[-1]["boundingPolygon"]["normalizedVertices"][2]["y"]) / 2
+      # Get the center y coordinate of the last line before "Development Trait"
+      development_trait_center_y = cy[end_index - 1]
 
       # Get the left and right boundaries from the line containing "Mentals"
-      left_boundary = sliced_lines[0]["boundingPolygon"]["normalizedVertices"][0]["x"] - 0.02  # Add tolerance
-      right_boundary = sliced_lines[0]["boundingPolygon"]["normalizedVertices"][1]["x"] + 0.02  # Add tolerance
+      tolerance = page_layout(index).tolerances["mentals_dx"]
+      left_boundary = index.x0[start_index] - tolerance
+      right_boundary = index.x1[start_index] + tolerance
 
       # Filter lines based on conditions
       filtered_lines = [
-          line
-          for line in sliced_lines
+          i
+          for i in range(start_index, end_index)
           if (
               # Check if line is below "Mentals" and above "Development Trait"
-              mentals_center_y <= (line["boundingPolygon"]["normalizedVertices"][0]["y"] + 
-                                   line["boundingPolygon"]["normalizedVertices"][2]["y"]) / 2 < development_trait_center_y
+              mentals_center_y <= cy[i] < development_trait_center_y
               # Check if at least one x-coordinate is within the boundaries
-              and any(left_boundary <= v["x"] <= right_boundary for v in line["boundingPolygon"]["normalizedVertices"])
+              and any(left_boundary <= x[i] <= right_boundary for x in xs)
               # Exclude "Mentals"
-              and line["text"] != "Mentals"
+              and text[i] != "Mentals"
           )
       ]
 
       # Extract mentals as a single string
-      extracted_matches["Mentals"] = ", ".join([line["text"] for line in filtered_lines])
+      extracted_matches["Mentals"] = ", ".join([text[i] for i in filtered_lines])
 
   return extracted_matches
 
-def extract_bio(data):
-    """Extracts the name (first and last), tendency, and position from the JSON data."""
-
-    # Get 'pages' data
-    pages = data["pages"]
-
-    # Initialize a dictionary to store the extracted values
-    extracted_data = {}
-
-    # Define approximate coordinate ranges with tolerance
-    first_name_x_min, first_name_x_max = 0.45, 0.53  # Adjusted for 'AUSTIN' example
-    first_name_y_min, first_name_y_max = 0.15, 0.22  # Adjusted for 'AUSTIN' example
-
-    last_name_x_min, last_name_x_max = 0.45, 0.67  # Adjusted for 'CANTWELL' example
-    last_name_y_min, last_name_y_max = 0.20, 0.26  # Adjusted for 'CANTWELL' example
-
-    tendency_x_min, tendency_x_max = 0.65, 0.78  # Adjusted for 'Improviser' example
-    tendency_y_min, tendency_y_max = 0.22, 0.30  # Adjusted for 'Improviser' example
-
-    # position_x_min, position_x_max = 0.05, 0.12  # Adjusted for 'QB' example
-    # position_y_min, position_y_max = 0.15, 0.23  # Adjusted for 'QB' example
+# Approximate coordinate ranges (x_min, x_max, y_min, y_max) of each bio field with tolerance.
+# A line belongs to a field when its first and third vertices both fall inside the range; the
+# fields are checked in this order and the last matching line wins.
+BIO_REGIONS = [
+    ("First Name", 0.45, 0.53, 0.15, 0.22),  # Adjusted for 'AUSTIN' example
+    ("Last Name", 0.45, 0.67, 0.20, 0.26),  # Adjusted for 'CANTWELL' example
+    ("Tendency", 0.65, 0.78, 0.22, 0.30),  # Adjusted for 'Improviser' example
+    # ("Position", 0.05, 0.12, 0.15, 0.23),  # Adjusted for 'QB' example
     # Update the coordinate ranges for 'Position' based on the new "ATH" location
-    position_x_min, position_x_max = 0.67, 0.73  # Adjusted for 'ATH' example
-    position_y_min, position_y_max = 0.17, 0.24  # Adjusted for 'ATH' example
-
-    class_x_min, class_x_max = 0.75, 0.85  # Keep the same
-    class_y_min, class_y_max = 0.18, 0.23  # Reduce the upper bound to minimize overlap, shift downwards
-
-    hometown_x_min, hometown_x_max = 0.75, 0.87  # Keep the same
-    hometown_y_min, hometown_y_max = 0.24, 0.30  # Increase the lower bound to minimize overlap was .24 and .3
-
-    height_weight_x_min, height_weight_x_max = 0.85, 0.96  # Adjusted for '6' 3" . 200 lbs' example
-    height_weight_y_min, height_weight_y_max = 0.18, 0.24  # Adjusted for '6' 3" . 200 lbs' example
+    ("Position", 0.67, 0.73, 0.17, 0.24),  # Adjusted for 'ATH' example
+    # Class: keep the x range, reduce the upper y bound to minimize overlap, shift downwards
+    ("Class", 0.75, 0.85, 0.18, 0.23),
+    # Hometown: keep the x range, increase the lower y bound to minimize overlap was .24 and .3
+    ("Hometown", 0.75, 0.87, 0.24, 0.30),
+    ("Height & Weight", 0.85, 0.96, 0.18, 0.24),  # Adjusted for '6' 3" . 200 lbs' example
+]
+
+# Tolerances the extractors use, unless a layout overrides them: how far (normalized) a value
+# may sit from its label in the spatial attribute matcher (attribute_value_dx/dy) and below its
+# label in the next-lines matchers (value_dx), and the margin around the "Mentals" header
+# (mentals_dx)
+DEFAULT_TOLERANCES = {
+    "attribute_value_dx": ATTRIBUTE_VALUE_MAX_DX,
+    "attribute_value_dy": ATTRIBUTE_VALUE_MAX_DY,
+    "value_dx": 0.1,
+    "mentals_dx": 0.02,
+}
+
+# A layout template describes one kind of screen as plain data, so a new screen (say the
+# transfer portal) only needs a JSON file passed with --layout:
+#
+#   name        shown in the --profile summary
+#   dimensions  [[width, height], ...] page sizes it applies to; leave out to match any size
+#   requires    line texts that must all be on the page, to tell apart screens of the same size
+#   units       "normalized" (default) or "pixels" for the region coordinates
+#   regions     [{"field", "x": [min, max], "y": [min, max], "anchor": text}, ...] in the
+#               order they are checked; with an anchor, x and y are offsets from the first
+#               vertex of the first line with that text, and the region is skipped on pages
+#               without it
+#   tolerances  overrides of DEFAULT_TOLERANCES
+#
+# DEFAULT_LAYOUT is the recruiting screen described by BIO_REGIONS. It matches every page, so
+# it is tried last.
+DEFAULT_LAYOUT = {
+    "name": "recruiting",
+    "regions": [
+        {"field": field, "x": [x_min, x_max], "y": [y_min, y_max]}
+        for field, x_min, x_max, y_min, y_max in BIO_REGIONS
+    ],
+}
+
+# Cells per axis of a compiled region lookup table
+LAYOUT_GRID_SIZE = 20
+
+# Smallest batch classify_bio_regions hands to NumPy. A single page is about twice as fast
+# through the grid lookup (the pipeline extracts one page at a time), and from ten pages up
+# both take about 22 µs per page.
+BIO_NUMPY_MIN_PAGES = 100
+
+# Layouts registered with set_layouts, tried before DEFAULT_LAYOUT
+_LAYOUTS = []
+
+# Compiled layouts by page size (see compiled_layouts)
+_COMPILED_LAYOUTS = {}
+
+class RegionTable:
+    """Bio regions with absolute, normalized bounds and a grid lookup table over them.
+
+    bounds lists (field, x_min, x_max, y_min, y_max) in template order. The envelope of all
+    regions is split into LAYOUT_GRID_SIZE cells per axis (plus one for its far edges) and every
+    cell lists, in the same order, the regions overlapping it. A line outside the envelope is
+    rejected with one comparison and any other is only checked against the regions of its
+    cell, however many regions and layouts there are.
+    """
+
+    __slots__ = ("bounds", "envelope", "x_scale", "y_scale", "grid", "_array")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self._array = None
+
+        if not bounds:
+            self.envelope = (1.0, 0.0, 1.0, 0.0)  # contains nothing
+            self.x_scale = self.y_scale = 0.0
+            self.grid = [[]]
+            return
+
+        x_lo, x_hi = min(region[1] for region in bounds), max(region[2] for region in bounds)
+        y_lo, y_hi = min(region[3] for region in bounds), max(region[4] for region in bounds)
+        self.envelope = (x_lo, x_hi, y_lo, y_hi)
+        self.x_scale = LAYOUT_GRID_SIZE / (x_hi - x_lo) if x_hi > x_lo else 0.0
+        self.y_scale = LAYOUT_GRID_SIZE / (y_hi - y_lo) if y_hi > y_lo else 0.0
+
+        width = LAYOUT_GRID_SIZE + 1
+        self.grid = [[] for _ in range(width * width)]
+        for region, (field, x_min, x_max, y_min, y_max) in enumerate(bounds):
+            for row in range(int((y_min - y_lo) * self.y_scale), int((y_max - y_lo) * self.y_scale) + 1):
+                for column in range(int((x_min - x_lo) * self.x_scale), int((x_max - x_lo) * self.x_scale) + 1):
+                    self.grid[row * width + column].append(region)
+
+    def candidates(self, x, y):
+        """Returns the positions of the regions that may contain the point (x, y)."""
+        x_lo, x_hi, y_lo, y_hi = self.envelope
+        if not (x_lo <= x <= x_hi and y_lo <= y <= y_hi):
+            return []
+        row = int((y - y_lo) * self.y_scale)
+        column = int((x - x_lo) * self.x_scale)
+        return self.grid[row * (LAYOUT_GRID_SIZE + 1) + column]
+
+    def array(self):
+        """Returns the bounds as four (1, regions) NumPy arrays for the vectorized classifier."""
+        if self._array is None:
+            self._array = np.array([region[1:] for region in self.bounds], dtype=np.float64).reshape(-1, 4).T[:, None, :]
+        return self._array
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+def _is_range(value):
+    return isinstance(value, list) and len(value) == 2 and all(map(_is_number, value)) and value[0] <= value[1]
+
+def check_layout(template):
+    """Raises ValueError unless template is a well-formed layout template (see DEFAULT_LAYOUT)."""
+    if not isinstance(template, dict):
+        raise ValueError(f"a layout template must be an object, not {template!r}")
+
+    name = template.get("name", "unnamed")
+    def invalid(message):
+        return ValueError(f"Layout {name!r} {message}")
+
+    unknown = set(template) - {"name", "dimensions", "requires", "units", "regions", "tolerances"}
+    if unknown:
+        raise invalid(f"has unknown keys: {', '.join(sorted(unknown))}")
+    if not isinstance(name, str):
+        raise invalid("needs a string name")
+
+    dimensions = template.get("dimensions", [])
+    if not isinstance(dimensions, list) or not all(
+        isinstance(size, list) and len(size) == 2 and all(_is_number(n) and n > 0 for n in size) for size in dimensions
+    ):
+        raise invalid(f"needs dimensions as a list of [width, height] pairs, not {dimensions!r}")
+
+    requires = template.get("requires", [])
+    if not isinstance(requires, list) or not all(isinstance(text, str) for text in requires):
+        raise invalid(f"needs requires as a list of line texts, not {requires!r}")
+
+    if template.get("units", "normalized") not in ("normalized", "pixels"):
+        raise invalid(f"has unknown units {template['units']!r}")
+
+    tolerances = template.get("tolerances", {})
+    if not isinstance(tolerances, dict):
+        raise invalid(f"needs tolerances as an object, not {tolerances!r}")
+    for key, value in tolerances.items():
+        if key not in DEFAULT_TOLERANCES:
+            raise invalid(f"has an unknown tolerance {key!r} (known: {', '.join(DEFAULT_TOLERANCES)})")
+        if not _is_number(value) or value < 0:
+            raise invalid(f"needs tolerance {key!r} to be a number >= 0, not {value!r}")
+
+    regions = template.get("regions")
+    if not isinstance(regions, list) or not regions:
+        raise invalid("has no regions")
+    for region in regions:
+        if (
+            not isinstance(region, dict)
+            or set(region) - {"field", "x", "y", "anchor"}
+            or not isinstance(region.get("field"), str)
+            or not _is_range(region.get("x"))
+            or not _is_range(region.get("y"))
+            or not isinstance(region.get("anchor", ""), str)
+        ):
+            raise invalid(f"has an invalid region (needs field, x: [min, max], y: [min, max] and optionally anchor): {region!r}")
+
+class CompiledLayout:
+    """A layout template compiled for one page size.
+
+    Pixel coordinates are converted to normalized ones and the regions are compiled once into
+    one RegionTable per anchor: the absolute regions in screen coordinates and each anchor's
+    regions in coordinates relative to that anchor. Per page, region_tables only looks up
+    where the anchors are.
+    """
+
+    __slots__ = ("name", "requires", "tolerances", "tables", "static")
+
+    def __init__(self, template, size):
+        check_layout(template)
+
+        if template.get("units", "normalized") == "pixels":
+            x_scale, y_scale = 1 / size[0], 1 / size[1]
+        else:
+            x_scale = y_scale = 1
+
+        self.name = template.get("name", "unnamed")
+        self.requires = list(template.get("requires", []))
+        self.tolerances = dict(DEFAULT_TOLERANCES, **template.get("tolerances", {}))
+
+        # Anchor (None for absolute regions) -> [(field, x_min, x_max, y_min, y_max)], normalized
+        bounds = {}
+        for region in template["regions"]:
+            (x_min, x_max), (y_min, y_max) = region["x"], region["y"]
+            bounds.setdefault(region.get("anchor"), []).append((
+                region["field"], x_min * x_scale, x_max * x_scale, y_min * y_scale, y_max * y_scale,
+            ))
+
+        self.tables = [(anchor, RegionTable(anchor_bounds)) for anchor, anchor_bounds in bounds.items()]
+
+        # Layouts without anchor-relative regions place the same table on every page
+        self.static = None
+        if list(bounds) in ([], [None]):
+            self.static = [(table, 0.0, 0.0) for _, table in self.tables]
+
+    def region_tables(self, index):
+        """Returns (RegionTable, x offset, y offset) for each table of the layout on one page.
+
+        An anchor's offset is the first vertex of the first line with its text; anchors
+        missing from the page are left out.
+        """
+        if self.static is not None:
+            return self.static
+
+        tables = []
+        for anchor, table in self.tables:
+            if anchor is None:
+                tables.append((table, 0.0, 0.0))
+            elif anchor in index.anchors:
+                line = index.anchors[anchor][0]
+                tables.append((table, index.x0[line], index.y0[line]))
+        return tables
+
+def set_layouts(templates):
+    """Registers layout templates, tried in order before DEFAULT_LAYOUT.
+
+    Replaces any previously registered ones. Every template is checked up front (see
+    check_layout) so mistakes raise ValueError here instead of on the first matching page.
+    """
+    global _LAYOUTS
+    templates = list(templates)
+    if templates == _LAYOUTS:
+        return
 
+    for template in templates:
+        check_layout(template)
+    _LAYOUTS = templates
+    _COMPILED_LAYOUTS.clear()
 
-    # Iterate through the lines in the first page
-    for line in pages[0]["lines"]:
-        vertices = line["boundingPolygon"]["normalizedVertices"]
-        x1, y1 = vertices[0]["x"], vertices[0]["y"]
-        x2, y2 = vertices[2]["x"], vertices[2]["y"]
-
-        # Check if coordinates fall within the approximate ranges for 'First Name'
-        if (first_name_x_min <= x1 <= first_name_x_max and first_name_y_min <= y1 <= first_name_y_max and
-                first_name_x_min <= x2 <= first_name_x_max and first_name_y_min <= y2 <= first_name_y_max):
-            extracted_data["First Name"] = line["text"]
-
-        # Check if coordinates fall within the approximate ranges for 'Last Name'
-        if (last_name_x_min <= x1 <= last_name_x_max and last_name_y_min <= y1 <= last_name_y_max and
-                last_name_x_min <= x2 <= last_name_x_max and last_name_y_min <= y2 <= last_name_y_max):
-            extracted_data["Last Name"] = line["text"]
-
-        # Check if coordinates fall within the approximate ranges for 'Tendency'
-        if (tendency_x_min <= x1 <= tendency_x_max and tendency_y_min <= y1 <= tendency_y_max and
-                tendency_x_min <= x2 <= tendency_x_max and tendency_y_min <= y2 <= tendency_y_max):
-            extracted_data["Tendency"] = line["text"]
-
-        # Check if coordinates fall within the approximate ranges for 'Position'
-        if (position_x_min <= x1 <= position_x_max and position_y_min <= y1 <= position_y_max and
-                position_x_min <= x2 <= position_x_max and position_y_min <= y2 <= position_y_max):
-            extracted_data["Position"] = line["text"]
-        # Check if coordinates fall within the approximate ranges for 'Class'
-        if (class_x_min <= x1 <= class_x_max and class_y_min <= y1 <= class_y_max and
-                class_x_min <= x2 <= class_x_max and class_y_min <= y2 <= class_y_max):
-            extracted_data["Class"] = line["text"]
-
-        # Check if coordinates fall within the approximate ranges for 'Hometown'
-        if (hometown_x_min <= x1 <= hometown_x_max and hometown_y_min <= y1 <= hometown_y_max and
-                hometown_x_min <= x2 <= hometown_x_max and hometown_y_min <= y2 <= hometown_y_max):
-            extracted_data["Hometown"] = line["text"]
-
-        # Check if coordinates fall within the approximate ranges for 'Height & Weight'
-        if (height_weight_x_min <= x1 <= height_weight_x_max and height_weight_y_min <= y1 <= height_weight_y_max and
-                height_weight_x_min <= x2 <= height_weight_x_max and height_weight_y_min <= y2 <= height_weight_y_max):
-            extracted_data["Height & Weight"] = line["text"]
+def load_layouts(file_path):
+    """Reads a JSON file holding one layout template or a list of them."""
+    with open(file_path, "r") as f:
+        templates = json.load(f)
+    return templates if isinstance(templates, list) else [templates]
+
+def _page_size(index):
+    """Returns (width, height) of a page in pixels, or None if the OCR result has no dimensions."""
+    dimensions = index.dimensions or {}
+    if dimensions.get("width") and dimensions.get("height"):
+        return (round(dimensions["width"]), round(dimensions["height"]))
+    return None
+
+def compiled_layouts(size):
+    """Returns the layouts that can apply to pages of a given size, compiled once per size.
+
+    Layouts listing the size come first, then the ones for any size, each in registration
+    order. Pixel layouts are left out for pages without dimensions.
+    """
+    layouts = _COMPILED_LAYOUTS.get(size)
+    if layouts is None:
+        templates = _LAYOUTS + [DEFAULT_LAYOUT]
+        sized = [
+            template for template in templates
+            if size is not None and "dimensions" in template
+            and any((round(width), round(height)) == size for width, height in template["dimensions"])
+        ]
+        unsized = [
+            template for template in templates
+            if "dimensions" not in template and (size is not None or template.get("units", "normalized") == "normalized")
+        ]
+        layouts = _COMPILED_LAYOUTS[size] = [CompiledLayout(template, size) for template in sized + unsized]
+    return layouts
+
+def page_layout(index):
+    """Returns the CompiledLayout of a page: the first candidate for its size whose required lines are all present.
+
+    The choice is cached on the index, so the extractors of one page select it only once.
+    """
+    if index.layout is None:
+        for layout in compiled_layouts(_page_size(index)):
+            if all(text in index.anchors for text in layout.requires):
+                index.layout = layout
+                break
+    return index.layout
+
+def _classify_bio_regions_scalar(index, tables):
+    """Matches every line of a page against the regions of its RegionTables (see CompiledLayout.region_tables)."""
+    width = LAYOUT_GRID_SIZE + 1
+    x0, y0, x2s, y2s = index.x0, index.y0, index.x2, index.y2
+
+    # Field -> position of the last line inside one of its regions
+    last_lines = {}
+
+    for table, x_offset, y_offset in tables:
+        bounds, grid, x_scale, y_scale = table.bounds, table.grid, table.x_scale, table.y_scale
+        x_lo, x_hi, y_lo, y_hi = table.envelope
+
+        # Iterate through the lines of the page
+        for i in range(len(x0)):
+            # The line's first vertex in the table's coordinates; skip it if it is outside every
+            # region of the table (RegionTable.candidates, inlined for speed)
+            x1, y1 = x0[i] - x_offset, y0[i] - y_offset
+            if not (y_lo <= y1 <= y_hi and x_lo <= x1 <= x_hi):
+                continue
+            x2, y2 = x2s[i] - x_offset, y2s[i] - y_offset
+
+            # Check if coordinates fall within the approximate ranges of the fields around the line
+            for region in grid[int((y1 - y_lo) * y_scale) * width + int((x1 - x_lo) * x_scale)]:
+                field, x_min, x_max, y_min, y_max = bounds[region]
+                if (x_min <= x1 <= x_max and y_min <= y1 <= y_max and
+                        x_min <= x2 <= x_max and y_min <= y2 <= y_max):
+                    # The last matching line wins, whichever table it was found through
+                    if last_lines.get(field, -1) <= i:
+                        last_lines[field] = i
+
+    return {field: index.text[i] for field, i in last_lines.items()}
+
+def _classify_bio_regions_numpy(indexes, table):
+    """Matches the lines of all pages against the regions of one RegionTable in a single broadcast comparison."""
+    texts = [text for index in indexes for text in index.text]
+    offsets = np.cumsum([0] + [len(index) for index in indexes])
+
+    # One row per line across the whole batch, one column per region. The index columns are
+    # arrays of doubles, so NumPy reads them without copying element by element.
+    def column(name):
+        return np.concatenate([np.frombuffer(getattr(index, name), dtype=np.float64) for index in indexes] or [np.empty(0)])[:, None]
+
+    x1, y1, x2, y2 = column("x0"), column("y0"), column("x2"), column("y2")
+    x_min, x_max, y_min, y_max = table.array()
+
+    inside = (
+        (x_min <= x1) & (x1 <= x_max) & (y_min <= y1) & (y1 <= y_max)
+        & (x_min <= x2) & (x2 <= x_max) & (y_min <= y2) & (y2 <= y_max)
+    )
+
+    # np.nonzero walks the matches line by line and region by region, the same order as the
+    # scalar loop, so replaying the assignments gives identical dicts (including key order)
+    lines, regions = np.nonzero(inside)
+    pages = np.searchsorted(offsets, lines, side="right") - 1
+
+    results = [{} for _ in indexes]
+    for page, line, region in zip(pages.tolist(), lines.tolist(), regions.tolist()):
+        results[page][table.bounds[region][0]] = texts[line]
+    return results
+
+def classify_bio_regions(indexes):
+    """Returns, for each page index, the text of the last line found inside each region of its layout.
+
+    A batch of at least BIO_NUMPY_MIN_PAGES pages that share one RegionTable at the same place
+    (the usual case: one screen type without anchor-relative regions) is compared in one
+    vectorized pass when NumPy is installed; otherwise every page goes through its table's
+    grid. Both give the same result.
+    """
+    tables = [page_layout(index).region_tables(index) for index in indexes]
+    if (np is not None and len(indexes) >= BIO_NUMPY_MIN_PAGES
+            and all(page_tables is tables[0] for page_tables in tables) and len(tables[0]) == 1):
+        return _classify_bio_regions_numpy(indexes, tables[0][0][0])
+    return [_classify_bio_regions_scalar(index, page_tables) for index, page_tables in zip(indexes, tables)]
+
+def _combine_bio_fields(extracted_data):
+    """Joins the first and last name into 'Name' and moves it to the front."""
 
     # Combine first and last name if both are found
     if "First Name" in extracted_data and "Last Name" in extracted_data:
@@ -343,101 +930,763 @@ def extract_bio(data):
 
     return extracted_data
 
-def process_json_files_in_folder(folder_path):
-    """Processes all JSON files in the specified folder and writes the extracted data to a CSV file."""
-
-    # Print the folder path being used
-    print(f"Searching for JSON files in: {folder_path}")
-
-    all_attribute_keys = set()
+def extract_bio(data, index=None):
+    """Extracts the name (first and last), tendency, and position from the JSON data.
+
+    The fields are read from the regions of the page's layout (see page_layout).
+    """
+
+    index = get_page_index(data, index)
+    return _combine_bio_fields(classify_bio_regions([index])[0])
+
+def extract_bio_batch(indexes):
+    """Extracts the bio fields of many page indexes at once, classifying all their lines together."""
+    return [_combine_bio_fields(extracted_data) for extracted_data in classify_bio_regions(indexes)]
+
+def build_player_row(bio_data, dev_trait_data, abilities_data, mentals_data, attributes_data):
+    """Combines the extracted sections of one screenshot into a single CSV row."""
+
+    # Extract State from Hometown if available
+    if "Hometown" in bio_data:
+        hometown = bio_data["Hometown"]
+        if ", " in hometown:
+            city, state = hometown.split(", ")
+            bio_data["State"] = state.strip()  # Remove any extra spaces
+
+    # Prepare the row data as a dictionary, including new bio fields
+    row_data = {
+        'Name': bio_data.get("Name"),
+        'Position': bio_data.get("Position"),
+        'Class': bio_data.get("Class"),
+        'Hometown': bio_data.get("Hometown"),
+        'State': bio_data.get("State"),  # Include State in the row
+        'Height & Weight': bio_data.get("Height & Weight"),
+        'Tendency': bio_data.get("Tendency"),
+        'star_rating': 4,  # Replace with actual extraction logic if available
+        'overall_rating': 69,  # Replace with actual extraction logic if available
+        'development_trait': dev_trait_data.get("Development Trait"),
+        'abilities': abilities_data.get("Abilities"),
+        'mentals': mentals_data.get("Mentals")
+    }
+    row_data.update(attributes_data)  # Add attributes to the row
+    return row_data
+
+def write_player_csv(output_path, rows, all_attribute_keys):
+    """Writes the player rows to a CSV file with the base columns followed by every attribute seen."""
+    with open(output_path, "w", newline="") as csvfile:
+        # Attribute columns are sorted so the header does not depend on file order
+        fieldnames = BASE_FIELDNAMES + sorted(all_attribute_keys)
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
 
-    # Collect all unique attribute keys before processing files
-    for filename in os.listdir(folder_path):
-        if filename.endswith(".json"):
-            file_path = os.path.join(folder_path, filename)
+        # Write the header row immediately
+        writer.writeheader()
+        writer.writerows(rows)
+
+class PipelineStats:
+    """Wall time per pipeline stage and named counters, collected when a run is profiled.
+
+    Each worker process fills its own instance and the parent merges them with merge().
+    """
+
+    def __init__(self):
+        self.seconds = {}
+        self.counters = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Adds the wall time of the with-block to the named stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, group, name, n=1):
+        """Adds n to a counter, e.g. count("anchor_not_found", "extract_mentals")."""
+        counters = self.counters.setdefault(group, {})
+        counters[name] = counters.get(name, 0) + n
+
+    def as_dict(self):
+        return {"seconds": self.seconds, "counters": self.counters}
+
+    def merge(self, stats):
+        """Adds the totals of another PipelineStats.as_dict() into this one."""
+        for name, seconds in stats["seconds"].items():
+            self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+        for group, counters in stats["counters"].items():
+            for name, n in counters.items():
+                self.count(group, name, n)
+
+class _NullStats:
+    """Stand-in for PipelineStats when profiling is off; every call is a no-op."""
+
+    _context = contextlib.nullcontext()
+
+    def stage(self, name):
+        return self._context
+
+    def count(self, group, name, n=1):
+        pass
+
+NULL_STATS = _NullStats()
+
+def extract_player(page, result, options, stats=NULL_STATS):
+    """Runs every extractor over one PageIndex and fills in result's attribute_keys, bio_data, row and error.
+
+    Shared by process_json_file and the packed-archive reader (see ocr_pack); exceptions are
+    left to the caller.
+    """
+    filename = page_label(result)
+
+    # Worker processes only see the layouts through options
+    if "layouts" in options:
+        set_layouts(options["layouts"])
+
+    if stats is not NULL_STATS:
+        stats.count("layout", page_layout(page).name)
+        for extractor in SECTION_ANCHORS:
+            if find_section(page, extractor)[0] is None:
+                stats.count("anchor_not_found", extractor)
+
+    # Attributes count towards the header even when the row itself is skipped
+    with stats.stage("extract_attributes"):
+        attributes_data = extract_attributes(page, matcher=options.get("attribute_matcher", "spatial")) or {}
+    result["attribute_keys"] = list(attributes_data)
+
+    with stats.stage("extract_bio"):
+        bio_data = extract_bio(page)
+    result["bio_data"] = dict(bio_data)
+
+    # Check if name_data is valid
+    if bio_data.get("Name") is None:
+        stats.count("anchor_not_found", "extract_bio")
+        result["error"] = f"Error processing file {filename}: Unable to extract player name."
+        return result
+
+    with stats.stage("extract_dev_trait"):
+        dev_trait_data = extract_dev_trait(page) or {}
+    with stats.stage("extract_abilities"):
+        abilities_data = extract_abilities(page) or {}
+    with stats.stage("extract_mentals"):
+        mentals_data = extract_mentals(page) or {}
+
+    result["row"] = build_player_row(bio_data, dev_trait_data, abilities_data, mentals_data, attributes_data)
+    return result
+
+def page_label(result):
+    """Names the page of a result in messages: its file name, plus the page after the first one."""
+    if result.get("page_index"):
+        return f"{result['filename']} (page {result['page_index'] + 1})"
+    return result["filename"]
+
+def new_result(filename, page_index=0):
+    """Returns an empty per-page result dict (see process_json_file)."""
+    return {"filename": filename, "page_index": page_index, "attribute_keys": [], "bio_data": None, "row": None, "error": None}
+
+def iter_document_results(file_path, options=None, profile=False, raw=None):
+    """Loads one OCR result and yields a result dict for each of its pages, as the pages are decoded.
+
+    Each result has the file name, the page's position in the document ("page_index"), its
+    attribute keys, the extracted bio_data, the CSV row (None when the page is skipped) and an
+    error message (None on success). Pages are pulled from iter_json_file_pages (or
+    iter_json_pages when the bytes are passed as raw), so a large batch result is never
+    decoded as a whole. A page that fails to extract gets an error and the next page is still
+    tried; a document that cannot be decoded ends with an error result. With profile=True
+    every result carries the PipelineStats.as_dict() of its page under "stats".
+    """
+    options = options or {}
+    filename = os.path.basename(file_path)
+    stats = PipelineStats() if profile else NULL_STATS
+    page_index = 0
+    result = new_result(filename)
+
+    try:
+        if raw is None and os.path.getsize(file_path) < STREAM_MIN_SIZE:
+            with stats.stage("read"):
+                with open(file_path, "rb") as f:
+                    # Only the text is kept, so the bytes are not alive while it is decoded
+                    raw = f.read().decode("utf-8")
+
+        if raw is not None and len(raw) < STREAM_MIN_SIZE:
+            # Decoded up front so the text is released before the pages are extracted
+            with stats.stage("json_decode"):
+                pages = iter(decode_lean_json_data(raw)["pages"])
+            raw = None
+        else:
+            pages = iter_json_pages(raw) if raw is not None else iter_json_file_pages(file_path)
+
+        while True:
+            with stats.stage("json_decode"):
+                page = next(pages, None)
+            if page is None:
+                break
+
+            result = new_result(filename, page_index)
             try:
-                data = load_json_data(file_path)
-                attributes_data = extract_attributes(data)
-                all_attribute_keys.update(attributes_data.keys())
-            except json.JSONDecodeError:
-                print(f"Error: Invalid JSON format in file {filename}")
-
-    # Check if any JSON files were found
-    if not all_attribute_keys:
-        print("No JSON files found in the specified folder.")
+                # Convert the page once; every extractor runs on the same compact index
+                with stats.stage("page_index"):
+                    index = build_page_index(page)
+
+                extract_player(index, result, options, stats)
+            except Exception as e:
+                result["error"] = f"Error processing file {page_label(result)}: {e}"
+
+            if profile:
+                result["stats"] = stats.as_dict()
+                stats = PipelineStats()
+            yield result
+            page_index += 1
+
+        if page_index == 0:
+            result["error"] = f"Error processing file {filename}: no pages found."
+    except JSON_DECODE_ERRORS:
+        result = new_result(filename, page_index)
+        result["error"] = f"Error: Invalid JSON format in file {filename}"
+    except Exception as e:
+        result = new_result(filename, page_index)
+        result["error"] = f"Error processing file {filename}: {e}"
+    else:
+        if page_index:
+            return
+
+    if profile:
+        result["stats"] = stats.as_dict()
+    yield result
+
+def process_json_file(file_path, options=None, profile=False, raw=None):
+    """Loads one OCR result and runs every extractor over each of its pages.
+
+    options holds extraction settings: "attribute_matcher" (see extract_attributes) and
+    "layouts", extra layout templates (see set_layouts).
+    Returns the list of iter_document_results results, one per page (a single error result if
+    the file cannot be read). Errors are returned instead of printed so the function can run
+    inside a worker process. If the result's bytes are already in memory (e.g. straight from
+    the OCR service) pass them as raw and file_path is only used for its name.
+    """
+    return list(iter_document_results(file_path, options, profile, raw))
+
+def iter_processed_files(file_paths, workers=1, options=None, profile=False):
+    """Yields the per-page result of every page of each path, in the order the paths were given.
+
+    In a single process the pages are streamed as they are decoded. With workers > 1 the
+    files are parsed and extracted in a pool of worker processes; results still come back in
+    input order however the work is scheduled.
+    """
+    if workers <= 1:
+        for file_path in file_paths:
+            yield from iter_document_results(file_path, options, profile)
         return
 
-    # Open the CSV file for writing after collecting all attribute keys
-    with open("player_data.csv", "w", newline="") as csvfile:
-        # Updated fieldnames to include 'State'
-        fieldnames = ['Name', 'Position', 'Class', 'Hometown', 'State', 'Height & Weight', 'Tendency', 'star_rating', 'overall_rating', 'development_trait', 'abilities', 'mentals'] + list(all_attribute_keys) 
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+    process = functools.partial(process_json_file, options=options, profile=profile)
+
+    # Hand out work in chunks so small files do not pay one round trip each
+    chunksize = max(1, len(file_paths) // (workers * 4))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        for results in executor.map(process, file_paths, chunksize=chunksize):
+            yield from results
+
+def file_sha256(file_path):
+    """Returns the hex SHA-256 digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def default_manifest_path(output_path):
+    """Returns the manifest path used for incremental runs writing to output_path."""
+    return os.path.splitext(output_path)[0] + ".manifest"
+
+def load_manifest(manifest_path, options=None):
+    """Loads an incremental-run manifest.
+
+    Returns an empty manifest if the file is missing or unreadable, or if its rows were
+    extracted with different options.
+    """
+    options = options or {}
+    try:
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION and manifest.get("options") == options:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {"version": MANIFEST_VERSION, "options": options, "files": {}}
+
+def save_manifest(manifest, manifest_path):
+    """Writes the manifest atomically so an interrupted run never leaves a truncated file behind."""
+    temp_path = manifest_path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(temp_path, manifest_path)
+
+def iter_incremental_results(file_paths, manifest, workers=1, options=None, profile=False, prune=True):
+    """Yields the per-page results of every path, re-extracting only new or changed files.
+
+    A file is unchanged when its size and mtime match the manifest, or failing that when its
+    content hash does; unchanged files yield their cached results with "cached" set. A file that
+    cannot be read (e.g. removed since the folder was listed) yields an error result and is
+    dropped from the manifest. The manifest is updated in place and, when prune is True, files
+    not in file_paths are dropped from it.
+    """
+    files = manifest["files"]
+    fingerprints = {}
+    stale_paths = []
+    failed = {}
+
+    for file_path in file_paths:
+        filename = os.path.basename(file_path)
+        try:
+            stat = os.stat(file_path)
+            entry = files.get(filename)
+
+            # Same size and mtime: trust the cached row without reading the file
+            if entry is not None and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                continue
+
+            digest = file_sha256(file_path)
+        except OSError as e:
+            failed[filename] = new_result(filename)
+            failed[filename]["error"] = f"Error processing file {filename}: {e}"
+            files.pop(filename, None)
+            continue
+
+        # Touched but identical content: refresh the fingerprint and keep the cached row
+        if entry is not None and entry["sha256"] == digest:
+            entry["size"], entry["mtime_ns"] = stat.st_size, stat.st_mtime_ns
+            continue
+
+        fingerprints[filename] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+        stale_paths.append(file_path)
+
+    # Every file yields at least one result, so the fresh results group by file name
+    fresh_results = itertools.groupby(iter_processed_files(stale_paths, workers, options, profile), key=lambda result: result["filename"])
+
+    for file_path in file_paths:
+        filename = os.path.basename(file_path)
+
+        if filename in failed:
+            yield failed[filename]
+        elif filename in fingerprints:
+            _, results = next(fresh_results)
+            cached = []
+            for result in results:
+                cached.append({key: result[key] for key in ("page_index", "attribute_keys", "row", "error")})
+                yield result
+            files[filename] = fingerprints[filename] | {"results": cached}
+        else:
+            for cached in files[filename]["results"]:
+                yield {"filename": filename, "bio_data": None, "cached": True} | cached
+
+    if not prune:
+        return
 
-        # Write the header row immediately
-        writer.writeheader()
+    # Forget files that were removed from the folder
+    current = {os.path.basename(file_path) for file_path in file_paths}
+    for filename in [filename for filename in files if filename not in current]:
+        del files[filename]
+
+def parse_shard(value):
+    """Parses a shard spec "i/N" (1 <= i <= N) into the tuple (i, N)."""
+    try:
+        index, count = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid shard {value!r}, expected i/N such as 1/4")
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f"invalid shard {value!r}, i must be between 1 and N")
+    return index, count
+
+def shard_of(filename, count):
+    """Returns the 1-based shard a file belongs to out of count, from a hash of its name.
+
+    SHA-256 is used rather than hash() so every machine assigns the same files to a shard.
+    """
+    digest = hashlib.sha256(filename.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+def default_shard_output_path(output_path, shard):
+    """Returns the partial output path of one shard of a run writing to output_path."""
+    return os.path.splitext(output_path)[0] + f".shard-{shard[0]}-of-{shard[1]}.jsonl"
+
+def write_shard_output(output_path, shard, total_files, attribute_keys, errors, records):
+    """Writes one shard's partial output.
+
+    The first line holds the shard, the number of files in the whole run, the attribute keys
+    this shard discovered and its errors; every further line is one {"position", "page", "row"}
+    record, where position is the row's file position in a single-node run and page its page
+    index in that file. records yields ((position, page), row) in ascending order.
+    """
+    temp_path = output_path + ".tmp"
+    with open(temp_path, "w") as f:
+        header = {
+            "version": SHARD_VERSION,
+            "shard": list(shard),
+            "files": total_files,
+            "attribute_keys": sorted(attribute_keys),
+            "errors": errors,
+        }
+        f.write(json.dumps(header) + "\n")
+        for (position, page), row in records:
+            f.write(json.dumps({"position": position, "page": page, "row": row}) + "\n")
+    os.replace(temp_path, output_path)
+
+def read_shard_header(partial_path):
+    """Returns the header line of a shard's partial output."""
+    with open(partial_path, "r") as f:
+        header = json.loads(f.readline())
+    if header.get("version") != SHARD_VERSION:
+        raise ValueError(f"{partial_path} is not a version {SHARD_VERSION} shard output")
+    return header
+
+def _iter_shard_records(partial_path):
+    with open(partial_path, "r") as f:
+        next(f)
+        for line in f:
+            record = json.loads(line)
+            yield (record["position"], record["page"]), record["row"]
+
+def iter_merged_rows(partial_paths):
+    """Yields the rows of every partial output in single-node order, streaming through the files."""
+    merged = heapq.merge(*(_iter_shard_records(partial_path) for partial_path in partial_paths), key=lambda record: record[0])
+    for _, row in merged:
+        yield row
+
+def record_snapshot(store, rows, source=None):
+    """Records rows as a new snapshot in the progression store and returns its id.
+
+    store is (db_path, label), as taken by process_json_files_in_folder and merge_shard_outputs.
+    """
+    import ocr_store
+
+    db_path, label = store
+    connection = ocr_store.open_store(db_path)
+    try:
+        snapshot_id = ocr_store.write_snapshot(connection, rows, label=label, source=source)
+    finally:
+        connection.close()
+    print(f"Recorded snapshot {snapshot_id} in {db_path}.")
+    return snapshot_id
+
+def merge_shard_outputs(partial_paths, output_path="player_data.csv", extra_attribute_keys=(), store=None):
+    """Combines the partial outputs of a sharded run into one CSV, as a single-node run would write it.
+
+    Every shard of the run must be present exactly once. The attribute columns are the union of
+    the keys each shard discovered, and rows come out in the same order as an unsharded run.
+    With store=(db_path, label) the merged rows are also recorded as a snapshot (see
+    record_snapshot). Returns the number of rows written.
+    """
+    headers = [read_shard_header(partial_path) for partial_path in partial_paths]
+
+    # All partials must come from the same split of the same input
+    runs = {(header["shard"][1], header["files"]) for header in headers}
+    if len(runs) != 1:
+        raise ValueError("the partial outputs come from different sharded runs")
+    count, total_files = runs.pop()
+
+    seen = sorted(header["shard"][0] for header in headers)
+    if seen != list(range(1, count + 1)):
+        missing = sorted(set(range(1, count + 1)) - set(seen))
+        duplicate = sorted({index for index in seen if seen.count(index) > 1})
+        raise ValueError(f"expected shards 1..{count} once each (missing: {missing or 'none'}, duplicated: {duplicate or 'none'})")
+
+    # Union of the attribute columns, as in a single-node run
+    all_attribute_keys = set()
+    errors = []
+    for header in headers:
+        all_attribute_keys.update(header["attribute_keys"])
+        errors.extend(header["errors"])
+
+    if errors:
+        print(f"{len(errors)} file(s) could not be processed:")
+        for error in errors:
+            print(error)
+
+    rows = 0
+    def counted(merged_rows):
+        nonlocal rows
+        for row in merged_rows:
+            rows += 1
+            yield row
+
+    write_player_csv(output_path, counted(iter_merged_rows(partial_paths)), all_attribute_keys | set(extra_attribute_keys))
+    print(f"Merged {rows} row(s) from {count} shard(s) ({total_files} file(s)) into {output_path}.")
+
+    if store is not None:
+        record_snapshot(store, iter_merged_rows(partial_paths))
+
+    return rows
+
+def process_json_files_in_folder(folder_path, output_path="player_data.csv", workers=1, incremental=False, manifest_path=None, options=None, verbose=False, profile=False, extra_attribute_keys=(), store=None, shard=None):
+    """Processes all JSON files in the specified folder and writes the extracted data to a CSV file.
+
+    Each file is read and parsed exactly once, and every page of a multi-page (batch job)
+    result becomes its own row, in page order. Rows are spooled to a temporary file (in memory
+    until ROW_SPOOL_MAX_SIZE bytes, then on disk) while the attribute columns are collected, and
+    the CSV is written at the end once the full header is known. Files are handled in sorted
+    filename order, optionally spread over `workers` processes, and any per-file errors are
+    reported together once all files have been processed.
+
+    With incremental=True a manifest of each file's size, mtime, content hash and extracted
+    rows is kept at manifest_path (next to the output by default); unchanged files are not
+    re-read and the CSV is rebuilt from their cached rows. options is passed on to
+    process_json_file.
+
+    extra_attribute_keys are added to the header even if no file has them, so rows appended
+    later (see ocr_watch) have a column to go in. folder_path may also be a pack archive
+    written by ocr_pack, whose documents are then streamed from the memory-mapped file (not
+    with incremental=True).
+
+    store=(db_path, label) also records the rows as a new snapshot in that SQLite progression
+    database (see record_snapshot). shard=(i, N) only processes the files that shard_of assigns
+    to shard i and writes a partial output (see write_shard_output) to output_path instead of
+    a CSV; merge_shard_outputs then combines the N partials. The two cannot be combined.
+
+    verbose=True prints every file name and its bio_data as it is processed. profile=True
+    records wall time per stage, anchor-not-found and empty-field counts and returns them as a
+    summary dict; otherwise None is returned.
+    """
+    run_start = time.perf_counter()
+    stats = PipelineStats() if profile else NULL_STATS
+    packed = os.path.isfile(folder_path)
+
+    if shard is not None and store is not None:
+        raise ValueError("a sharded run writes a partial output; record the snapshot when merging")
+
+    if packed:
+        import ocr_pack
+
+        # A pack archive (see ocr_pack) stands in for the folder of JSON files
+        if not ocr_pack.is_pack(folder_path):
+            raise ocr_pack.PackError(f"{folder_path} is neither a folder nor a pack archive")
+        print(f"Reading packed OCR results from: {folder_path}")
+        if incremental:
+            raise ValueError("--incremental works on a folder of JSON files, not on a pack archive")
+
+        with ocr_pack.PackReader(folder_path) as reader:
+            file_paths = reader.names()
+    else:
+        # Print the folder path being used
+        print(f"Searching for JSON files in: {folder_path}")
+
+        file_paths = [
+            os.path.join(folder_path, filename)
+            for filename in sorted(os.listdir(folder_path))
+            if filename.endswith(".json")
+        ]
 
-        # Now process each file and write data to CSV
-        for filename in os.listdir(folder_path):
-            if filename.endswith(".json"):
-                file_path = os.path.join(folder_path, filename)
+    # Keep each file's position in the whole run so shard outputs merge back in the same order
+    total_files = len(file_paths)
+    if shard is not None:
+        positions = [position for position, file_path in enumerate(file_paths) if shard_of(os.path.basename(file_path), shard[1]) == shard[0]]
+        file_paths = [file_paths[position] for position in positions]
+        print(f"Shard {shard[0]}/{shard[1]}: {len(file_paths)} of {total_files} file(s).")
+
+    if packed:
+        results = ocr_pack.iter_packed_results(folder_path, file_paths, workers, options, profile)
+    elif incremental:
+        manifest_path = manifest_path or default_manifest_path(output_path)
+        manifest = load_manifest(manifest_path, options)
+        results = iter_incremental_results(file_paths, manifest, workers, options, profile)
+    else:
+        results = iter_processed_files(file_paths, workers, options, profile)
 
+    all_attribute_keys = set()
+    errors = []
+    reused = 0
+    rows = 0
+    row_positions = []
+    if shard is not None:
+        position_of = {os.path.basename(file_paths[k]): position for k, position in enumerate(positions)}
+
+    with tempfile.SpooledTemporaryFile(max_size=ROW_SPOOL_MAX_SIZE, mode="w+") as spool:
+        for result in results:
+            all_attribute_keys.update(result["attribute_keys"])
+
+            if result.get("cached"):
+                if result["page_index"] == 0:
+                    reused += 1
+            elif verbose:
                 # Print the filename being processed
-                print(f"Processing file: {filename}")
-
-                try:
-                    data = load_json_data(file_path)
-
-                    # Extract bio_data before printing it
-                    bio_data = extract_bio(data)
-
-                    # Print the extracted bio_data
-                    print(f"Extracted bio_data: {bio_data}")
-
-                    # Check if name_data is valid
-                    if bio_data is None or bio_data.get("Name") is None:
-                        print(f"Error processing file {filename}: Unable to extract player name.")
-                        continue  # Skip to the next file
-
-                    # Extract State from Hometown if available
-                    if "Hometown" in bio_data:
-                        hometown = bio_data["Hometown"]
-                        if ", " in hometown:
-                            city, state = hometown.split(", ")
-                            bio_data["State"] = state.strip()  # Remove any extra spaces
-
-                    dev_trait_data = extract_dev_trait(data) or {}
-                    abilities_data = extract_abilities(data) or {}
-                    mentals_data = extract_mentals(data) or {}
-                    attributes_data = extract_attributes(data) or {}
-
-                    # Prepare the row data as a dictionary, including new bio fields
-                    row_data = {
-                        'Name': bio_data.get("Name"),
-                        'Position': bio_data.get("Position"),
-                        'Class': bio_data.get("Class"),
-                        'Hometown': bio_data.get("Hometown"),
-                        'State': bio_data.get("State"),  # Include State in the row
-                        'Height & Weight': bio_data.get("Height & Weight"),
-                        'Tendency': bio_data.get("Tendency"),
-                        'star_rating': 4,  # Replace with actual extraction logic if available
-                        'overall_rating': 69,  # Replace with actual extraction logic if available
-                        'development_trait': dev_trait_data.get("Development Trait"),
-                        'abilities': abilities_data.get("Abilities"),
-                        'mentals': mentals_data.get("Mentals")
-                    }
-                    row_data.update(attributes_data)  # Add attributes to the row
-
-                    # Write the row to the CSV file
-                    writer.writerow(row_data)
-
-                except json.JSONDecodeError:
-                    print(f"Error: Invalid JSON format in file {filename}")
-                except Exception as e:
-                    print(f"Error processing file {filename}: {e}")
+                print(f"Processing file: {page_label(result)}")
+
+                # Print the extracted bio_data
+                if result["bio_data"] is not None:
+                    print(f"Extracted bio_data: {result['bio_data']}")
+
+            if "stats" in result:
+                stats.merge(result["stats"])
+
+            if result["error"] is not None:
+                errors.append(result["error"])
+            elif result["row"] is not None:
+                rows += 1
+                if profile:
+                    for field in BASE_FIELDNAMES:
+                        if result["row"].get(field) in (None, ""):
+                            stats.count("empty_fields", field)
+
+                # Park the row until the header is complete
+                spool.write(json.dumps(result["row"]) + "\n")
+                if shard is not None:
+                    row_positions.append((position_of[result["filename"]], result["page_index"]))
+
+        if incremental:
+            save_manifest(manifest, manifest_path)
+            print(f"Reused {reused} unchanged file(s), extracted {len(file_paths) - reused}.")
+
+        # Report the files that could not be processed
+        if errors:
+            print(f"{len(errors)} file(s) could not be processed:")
+            for error in errors:
+                print(error)
+
+        # A shard always leaves a partial output, even an empty one, so the merge can check it
+        if shard is not None:
+            with stats.stage("shard_write"):
+                spool.seek(0)
+                write_shard_output(output_path, shard, total_files, all_attribute_keys, errors, zip(row_positions, (json.loads(line) for line in spool)))
+            print(f"Wrote {rows} row(s) from {len(file_paths)} file(s) to {output_path}.")
+
+        # Check if any JSON files were found
+        elif not all_attribute_keys:
+            if file_paths:
+                print(f"No player data could be extracted from {len(file_paths)} file(s); {output_path} was not written.")
+            else:
+                print("No JSON files found in the specified folder.")
+            return
+
+        # Replay the spooled rows into the CSV now that every attribute column is known
+        else:
+            with stats.stage("csv_write"):
+                spool.seek(0)
+                write_player_csv(output_path, (json.loads(line) for line in spool), all_attribute_keys | set(extra_attribute_keys))
+
+            print(f"Wrote {rows} row(s) from {len(file_paths)} file(s) to {output_path}.")
+
+        if store is not None:
+            with stats.stage("store_write"):
+                spool.seek(0)
+                record_snapshot(store, (json.loads(line) for line in spool), source=os.path.abspath(folder_path))
+
+    if profile:
+        wall_seconds = time.perf_counter() - run_start
+        return {
+            "files": len(file_paths),
+            "rows": rows,
+            "errors": len(errors),
+            "cached": reused,
+            "workers": workers,
+            "wall_seconds": round(wall_seconds, 6),
+            "files_per_sec": round(len(file_paths) / wall_seconds, 1) if wall_seconds > 0 else None,
+            "stage_seconds": {name: round(seconds, 6) for name, seconds in stats.seconds.items()},
+            "anchor_not_found": stats.counters.get("anchor_not_found", {}),
+            "empty_fields": stats.counters.get("empty_fields", {}),
+            "layouts": stats.counters.get("layout", {}),
+        }
 
 if __name__ == "__main__":
-    folder_path = os.getcwd()  # Replace with the actual folder path
-    process_json_files_in_folder(folder_path)
+    parser = argparse.ArgumentParser(description="Extracts player data from recruiting screenshot OCR results into player_data.csv.")
+    parser.add_argument("folder", nargs="?", help="folder containing the OCR JSON files, or a pack archive from ocr_pack.py (default: current directory)")
+    parser.add_argument("--output", default="player_data.csv", help="CSV file to write (default: player_data.csv)")
+    parser.add_argument("--workers", type=int, default=1, help="number of processes used to parse and extract files (default: 1)")
+    parser.add_argument("--incremental", action="store_true", help="only re-extract new or changed files, reusing cached rows from the manifest")
+    parser.add_argument("--attribute-matcher", choices=["spatial", "window"], default="spatial", help="how attribute labels are paired with their values (default: spatial)")
+    parser.add_argument("--layout", action="append", default=[], metavar="PATH", help="JSON layout template(s) for other screens, tried before the built-in recruiting layout (repeatable)")
+    parser.add_argument("--verbose", action="store_true", help="print every file and its extracted bio data while processing")
+    parser.add_argument("--profile", nargs="?", const="-", metavar="PATH", help="write a JSON summary of stage timings and counters to PATH (default: stdout)")
+    parser.add_argument("--cprofile", metavar="PATH", help="dump cProfile stats of the main process to PATH")
+    parser.add_argument("--store", metavar="DB", help="also record the rows as a snapshot in this SQLite progression database")
+    parser.add_argument("--store-label", help="label for the --store snapshot, e.g. \"Week 3\"")
+    parser.add_argument("--shard", type=parse_shard, metavar="I/N", help="only process shard I of N (by a hash of the file name) and write a partial output for --merge")
+    parser.add_argument("--merge", nargs="+", metavar="PARTIAL", help="combine the partial outputs of a sharded run into --output instead of processing files")
+    parser.add_argument("--watch", action="store_true", help="keep running and append rows for new or modified files as they appear")
+    parser.add_argument("--debounce", type=float, default=1.0, help="seconds a file must be quiet before it is ingested in --watch mode (default: 1.0)")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="folder scan interval when inotify is unavailable in --watch mode (default: 2.0)")
+    args = parser.parse_args()
+
+    if args.merge:
+        # A merge only combines the partial outputs, so any option for processing files would be ignored
+        ignored = [
+            name for name, given in [
+                ("a folder", args.folder is not None), ("--workers", args.workers != 1),
+                ("--incremental", args.incremental), ("--attribute-matcher", args.attribute_matcher != "spatial"),
+                ("--layout", args.layout), ("--verbose", args.verbose), ("--watch", args.watch),
+            ] if given
+        ]
+        if ignored:
+            parser.error(f"--merge only combines partial outputs and cannot be combined with {', '.join(ignored)}")
+    if args.folder is None:
+        args.folder = os.getcwd()
+
+    options = {"attribute_matcher": args.attribute_matcher}
+    if args.layout:
+        try:
+            options["layouts"] = [template for path in args.layout for template in load_layouts(path)]
+            set_layouts(options["layouts"])
+        except (OSError, ValueError) as e:
+            parser.error(f"--layout: {e}")
+
+    if os.path.isfile(args.folder):
+        import ocr_pack
+
+        if not ocr_pack.is_pack(args.folder):
+            parser.error(f"{args.folder} is neither a folder of JSON files nor a pack archive from ocr_pack.py")
+        if args.incremental or args.watch:
+            parser.error("--incremental and --watch need a folder of JSON files, not a pack archive")
+        try:
+            ocr_pack.PackReader(args.folder).close()
+        except ocr_pack.PackError as e:
+            parser.error(str(e))
+    if args.shard and (args.watch or args.store or args.merge):
+        parser.error("--shard cannot be combined with --watch, --store or --merge (record the snapshot when merging)")
+    if args.watch and args.store:
+        parser.error("--store cannot be combined with --watch (record a snapshot with a regular run afterwards)")
+    if args.store_label and not args.store:
+        parser.error("--store-label needs --store")
+    if (args.watch or args.merge) and (args.profile or args.cprofile):
+        parser.error("--profile and --cprofile cannot be combined with --watch or --merge")
+
+    # Where to record the snapshot, see record_snapshot
+    store = (args.store, args.store_label) if args.store else None
+
+    if args.merge:
+        try:
+            merge_shard_outputs(args.merge, args.output, store=store)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        sys.exit(0)
+
+    # Each shard writes its own partial output next to the CSV
+    output_path = default_shard_output_path(args.output, args.shard) if args.shard else args.output
+
+    if args.watch:
+        import ocr_watch
+
+        ocr_watch.watch_folder(
+            args.folder, output_path=args.output, workers=args.workers, options=options,
+            debounce=args.debounce, poll_interval=args.poll_interval, verbose=args.verbose,
+        )
+        sys.exit(0)
+
+    run = functools.partial(
+        process_json_files_in_folder, args.folder, output_path=output_path, workers=args.workers,
+        incremental=args.incremental, options=options, verbose=args.verbose, profile=args.profile is not None,
+        store=store, shard=args.shard,
+    )
+
+    if args.cprofile:
+        profiler = cProfile.Profile()
+        summary = profiler.runcall(run)
+        profiler.dump_stats(args.cprofile)
+    else:
+        summary = run()
+
+    if summary is not None:
+        if args.profile == "-":
+            print(json.dumps(summary, indent=2))
+        else:
+            with open(args.profile, "w") as f:
+                json.dump(summary, f, indent=2)
    
 #     file_path = "cantwell.json"  # Replace with your actual file path
 #     data = load_json_data(file_path)
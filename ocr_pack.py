@@ -0,0 +1,410 @@
+"""Packed archive of OCR results: one file instead of tens of thousands of pretty-printed JSON files.
+
+Each document is stored as reduced line records, only what a PageIndex holds: the line text
+and the x0..x3, y0, y2, cx, cy and top-to-bottom order columns the extractors read, as packed
+little-endian doubles. An index at the end of the file maps every document's file name to its
+offset, length and the SHA-256 of the original JSON. The archive is read through mmap, so a
+single document can be looked up without touching the others and a full re-extraction streams
+through the file sequentially with no JSON decoding at all.
+
+    python ocr_pack.py pack json results.pack
+    python ocr_pack.py ls results.pack
+    python ocr_pack.py show results.pack defaultObject5.json
+    python ocr.py results.pack --workers 4
+
+Layout:
+
+    header   magic "CFBPACK\\0", version u32, document count u32, index offset u64
+    document page count u32, then per page:
+             page number i32 (-1 if unknown), line count u32, dimensions length u32, text length u32,
+             dimensions (JSON), line text (UTF-8, NUL separated),
+             x0, x1, x2, x3, y0, y2, cx, cy (line count f64 each), by_y (line count i32)
+    index    per document: name length u16, SHA-256 (32 bytes), offset u64, length u64, name (UTF-8)
+"""
+
+import argparse
+import concurrent.futures
+import functools
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+import ocr
+
+PACK_MAGIC = b"CFBPACK\0"
+PACK_VERSION = 1
+
+_HEADER = struct.Struct("<8sIIQ")
+_PAGE_COUNT = struct.Struct("<I")
+_PAGE_HEADER = struct.Struct("<iIII")
+_INDEX_ENTRY = struct.Struct("<H32sQQ")
+
+# PageIndex columns stored as doubles, in file order
+_COORDINATE_COLUMNS = ("x0", "x1", "x2", "x3", "y0", "y2", "cx", "cy")
+
+class PackError(Exception):
+    """Raised for a file that is not a readable pack archive."""
+
+# The columns are copied straight into array("d")/array("i"), which use the machine's byte
+# order; the file is little-endian, so they are byte-swapped on a big-endian host
+_BYTESWAP = sys.byteorder == "big"
+
+def encode_page(page):
+    """Returns the reduced line record of one PageIndex."""
+    if any("\0" in text for text in page.text):
+        raise ValueError("line text must not contain NUL characters")
+
+    text_bytes = "\0".join(page.text).encode("utf-8")
+    dimensions = json.dumps(page.dimensions).encode() if page.dimensions is not None else b""
+    page_number = page.page_number if page.page_number is not None else -1
+
+    parts = [_PAGE_HEADER.pack(page_number, len(page), len(dimensions), len(text_bytes)), dimensions, text_bytes]
+    for name in _COORDINATE_COLUMNS:
+        column = array("d", getattr(page, name))
+        if _BYTESWAP:
+            column.byteswap()
+        parts.append(column.tobytes())
+    by_y = array("i", page.by_y)
+    if _BYTESWAP:
+        by_y.byteswap()
+    parts.append(by_y.tobytes())
+    return b"".join(parts)
+
+def encode_document(pages):
+    """Returns the record of one document given its PageIndexes."""
+    return _PAGE_COUNT.pack(len(pages)) + b"".join(encode_page(page) for page in pages)
+
+def decode_document(record):
+    """Rebuilds the PageIndexes of one document from its record (bytes or a memoryview)."""
+    (page_count,) = _PAGE_COUNT.unpack_from(record, 0)
+    offset = _PAGE_COUNT.size
+    pages = []
+
+    for _ in range(page_count):
+        page_number, line_count, dimensions_length, text_length = _PAGE_HEADER.unpack_from(record, offset)
+        offset += _PAGE_HEADER.size
+
+        dimensions = json.loads(bytes(record[offset:offset + dimensions_length])) if dimensions_length else None
+        offset += dimensions_length
+
+        page = ocr.PageIndex(None if page_number < 0 else page_number, dimensions)
+        if line_count:
+            page.text = str(record[offset:offset + text_length], "utf-8").split("\0")
+        offset += text_length
+
+        column_size = line_count * 8
+        for name in _COORDINATE_COLUMNS:
+            column = getattr(page, name)
+            column.frombytes(record[offset:offset + column_size])
+            if _BYTESWAP:
+                column.byteswap()
+            offset += column_size
+
+        by_y = array("i")
+        by_y.frombytes(record[offset:offset + line_count * 4])
+        if _BYTESWAP:
+            by_y.byteswap()
+        page.by_y = array("l", by_y)
+        offset += line_count * 4
+
+        for position, text in enumerate(page.text):
+            page.anchors.setdefault(text, []).append(position)
+
+        pages.append(page)
+
+    return pages
+
+def write_pack(pack_path, documents):
+    """Writes a pack archive from (name, sha256_hex, record) tuples and returns the document count.
+
+    The archive is written to a temporary file and moved into place, so readers never see a
+    half-written pack.
+    """
+    temp_path = pack_path + ".tmp"
+    index = []
+
+    with open(temp_path, "wb") as f:
+        f.write(_HEADER.pack(PACK_MAGIC, PACK_VERSION, 0, 0))
+        for name, sha256, record in documents:
+            index.append((name, sha256, f.tell(), len(record)))
+            f.write(record)
+
+        index_offset = f.tell()
+        for name, sha256, offset, length in index:
+            name_bytes = name.encode("utf-8")
+            f.write(_INDEX_ENTRY.pack(len(name_bytes), bytes.fromhex(sha256), offset, length))
+            f.write(name_bytes)
+
+        f.seek(0)
+        f.write(_HEADER.pack(PACK_MAGIC, PACK_VERSION, len(index), index_offset))
+
+    os.replace(temp_path, pack_path)
+    return len(index)
+
+class PackReader:
+    """Memory-mapped read access to a pack archive.
+
+    Documents are looked up by file name (reader[name] or reader.get_pages(name)) or by the
+    SHA-256 of the original JSON (reader.find_sha256(digest)); iter_documents() streams all of
+    them in file order.
+    """
+
+    def __init__(self, pack_path):
+        self.pack_path = pack_path
+        self._file = open(pack_path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise PackError(f"{pack_path} is empty")
+
+        if len(self._map) < _HEADER.size:
+            self.close()
+            raise PackError(f"{pack_path} is too short to be a pack archive")
+
+        magic, version, count, index_offset = _HEADER.unpack_from(self._map, 0)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            self.close()
+            raise PackError(f"{pack_path} is not a version {PACK_VERSION} pack archive")
+
+        # name -> (sha256 hex, offset, length), in file order
+        self.entries = {}
+        position = index_offset
+        try:
+            for _ in range(count):
+                name_length, sha256, offset, length = _INDEX_ENTRY.unpack_from(self._map, position)
+                position += _INDEX_ENTRY.size
+                name = str(self._map[position:position + name_length], "utf-8")
+                position += name_length
+                if position > len(self._map) or offset + length > index_offset:
+                    raise ValueError("index entry out of bounds")
+                self.entries[name] = (sha256.hex(), offset, length)
+        except (struct.error, ValueError):
+            self.close()
+            raise PackError(f"{pack_path} has a truncated or corrupt index")
+
+        self._by_sha256 = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def names(self):
+        """Returns the document names in file order."""
+        return list(self.entries)
+
+    def record(self, name):
+        """Returns a zero-copy memoryview of one document's record."""
+        _, offset, length = self.entries[name]
+        return memoryview(self._map)[offset:offset + length]
+
+    def get_pages(self, name):
+        """Returns the PageIndexes of one document."""
+        record = self.record(name)
+        try:
+            return decode_document(record)
+        finally:
+            record.release()
+
+    __getitem__ = get_pages
+
+    def find_sha256(self, sha256):
+        """Returns the name of the document whose original JSON had this SHA-256, or None."""
+        if self._by_sha256 is None:
+            self._by_sha256 = {entry[0]: name for name, entry in self.entries.items()}
+        return self._by_sha256.get(sha256)
+
+    def iter_documents(self):
+        """Yields (name, pages) for every document in file order, a sequential pass over the map."""
+        for name in self.entries:
+            yield name, self.get_pages(name)
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def is_pack(path):
+    """Returns True if path is a file that starts with the pack magic."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(PACK_MAGIC)) == PACK_MAGIC
+    except OSError:
+        return False
+
+def pack_folder(folder_path, pack_path, verbose=False):
+    """Packs every *.json OCR result in folder_path into pack_path and returns (packed, reused, errors).
+
+    If pack_path already exists, documents whose name and content hash are unchanged are copied
+    from it instead of being decoded again. Files that cannot be decoded are left out and
+    reported in errors.
+    """
+    previous = PackReader(pack_path) if os.path.exists(pack_path) and is_pack(pack_path) else None
+    errors = []
+    reused = 0
+
+    def documents():
+        nonlocal reused
+        for filename in sorted(os.listdir(folder_path)):
+            if not filename.endswith(".json"):
+                continue
+            with open(os.path.join(folder_path, filename), "rb") as f:
+                raw = f.read()
+            sha256 = hashlib.sha256(raw).hexdigest()
+
+            if previous is not None and filename in previous and previous.entries[filename][0] == sha256:
+                reused += 1
+                yield filename, sha256, bytes(previous.record(filename))
+                continue
+
+            try:
+                record = encode_document([ocr.build_page_index(page) for page in ocr.iter_json_pages(raw)])
+            except Exception as e:
+                errors.append(f"Error packing file {filename}: {e}")
+                continue
+            if verbose:
+                print(f"Packed file: {filename}")
+            yield filename, sha256, record
+
+    try:
+        packed = write_pack(pack_path, documents())
+    finally:
+        if previous is not None:
+            previous.close()
+
+    return packed, reused, errors
+
+# Readers opened by this process, so pool workers map each archive once: path -> ((inode,
+# mtime, size) of the file when it was mapped, reader)
+_READERS = {}
+
+def _open_reader(pack_path):
+    """Returns a cached PackReader for pack_path, reopening it if the file was replaced since."""
+    st = os.stat(pack_path)
+    version = (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    cached = _READERS.get(pack_path)
+    if cached is not None:
+        if cached[0] == version:
+            return cached[1]
+        del _READERS[pack_path]
+        cached[1].close()
+
+    reader = PackReader(pack_path)
+    _READERS[pack_path] = (version, reader)
+    return reader
+
+def process_packed_document(pack_path, name, options=None, profile=False):
+    """The ocr.process_json_file equivalent for a document stored in a pack archive: one result per page."""
+    options = options or {}
+    stats = ocr.PipelineStats() if profile else ocr.NULL_STATS
+    results = []
+
+    try:
+        with stats.stage("page_index"):
+            pages = _open_reader(pack_path).get_pages(name)
+    except Exception as e:
+        pages = []
+        error = f"Error processing file {name}: {e}"
+    else:
+        error = f"Error processing file {name}: no pages found."
+
+    for page_index, page in enumerate(pages):
+        result = ocr.new_result(name, page_index)
+        try:
+            ocr.extract_player(page, result, options, stats)
+        except Exception as e:
+            result["error"] = f"Error processing file {ocr.page_label(result)}: {e}"
+        if profile:
+            result["stats"] = stats.as_dict()
+            stats = ocr.PipelineStats()
+        results.append(result)
+
+    if not results:
+        result = ocr.new_result(name)
+        result["error"] = error
+        if profile:
+            result["stats"] = stats.as_dict()
+        results.append(result)
+
+    return results
+
+def iter_packed_results(pack_path, names=None, workers=1, options=None, profile=False):
+    """Yields the per-page results of every document (or of names), in archive order.
+
+    Like ocr.iter_processed_files, workers > 1 spreads the extraction over a process pool;
+    each worker maps the archive itself, so only names travel between processes.
+    """
+    if names is None:
+        with PackReader(pack_path) as reader:
+            names = reader.names()
+
+    process = functools.partial(process_packed_document, pack_path, options=options, profile=profile)
+
+    if workers <= 1:
+        for results in map(process, names):
+            yield from results
+        return
+
+    chunksize = max(1, len(names) // (workers * 4))
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        for results in executor.map(process, names, chunksize=chunksize):
+            yield from results
+
+def _page_lines(page):
+    """Returns the reduced line records of a PageIndex as dicts, for display."""
+    return [
+        {"text": text} | {name: getattr(page, name)[position] for name in _COORDINATE_COLUMNS}
+        for position, text in enumerate(page.text)
+    ]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Packs OCR results into a single memory-mapped archive.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    pack = commands.add_parser("pack", help="pack every *.json in a folder (reusing unchanged documents of an existing archive)")
+    pack.add_argument("folder", help="folder containing the OCR JSON files")
+    pack.add_argument("pack", help="archive to write, e.g. results.pack")
+    pack.add_argument("--verbose", action="store_true", help="print every file that is packed")
+
+    ls = commands.add_parser("ls", help="list the documents in an archive")
+    ls.add_argument("pack")
+
+    show = commands.add_parser("show", help="print the line records of one document")
+    show.add_argument("pack")
+    show.add_argument("name", help="document file name, or the SHA-256 of the original JSON")
+
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        packed, reused, errors = pack_folder(args.folder, args.pack, args.verbose)
+        for error in errors:
+            print(error)
+        print(f"Packed {packed} file(s) into {args.pack} ({reused} reused, {os.path.getsize(args.pack)} bytes).")
+        sys.exit(1 if errors else 0)
+
+    with PackReader(args.pack) as reader:
+        if args.command == "ls":
+            for name, (sha256, offset, length) in reader.entries.items():
+                print(f"{sha256}  {length:>8}  {name}")
+        else:
+            name = args.name if args.name in reader else reader.find_sha256(args.name)
+            if name is None:
+                sys.exit(f"{args.name} is not in {args.pack}")
+            pages = [
+                {"pageNumber": page.page_number, "dimensions": page.dimensions, "lines": _page_lines(page)}
+                for page in reader.get_pages(name)
+            ]
+            json.dump({"name": name, "sha256": reader.entries[name][0], "pages": pages}, sys.stdout, indent=2)
+            print()
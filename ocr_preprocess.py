@@ -0,0 +1,196 @@
+"""Crops recruiting screenshots down to the regions the extractors read before they are sent for OCR.
+
+Only three parts of the screen are used: the bio band that extract_bio classifies (derived
+from ocr.BIO_REGIONS), the Attributes/Abilities/Mentals/Development Trait panels, and the
+"@ Select Prospect" button that closes those sections. They are cut out, downscaled, stacked
+into one small image and encoded as JPEG, which is a fraction of the bytes of a full 4K
+screenshot. The crop plan returned alongside the image lets remap_ocr_result move the OCR boxes
+back into the normalized coordinates of the original screen, so the extractors see the same
+layout as before.
+
+Requires Pillow.
+
+    python ocr_preprocess.py image.png 1917c549cbe40-screenshotUrl.jpg --out-dir cropped
+"""
+
+import argparse
+import io
+import json
+import os
+
+import ocr
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is only needed to crop, not to remap results
+    Image = None
+
+# Extra margin (normalized) around every region so text on its edge is not cut
+REGION_MARGIN = 0.01
+
+# Envelope of the Attributes, Abilities, Mentals and Development Trait panels on the sample
+# screens (x_min, y_min, x_max, y_max); the sections themselves are found from their anchors
+PANEL_REGION = (0.47, 0.41, 0.95, 0.83)
+
+# The "@ Select Prospect" button, which ends the Attributes, Abilities and Development Trait sections
+SELECT_PROSPECT_REGION = (0.03, 0.94, 0.14, 0.985)
+
+# Black rows between the stacked crops so OCR never joins text across two regions
+CROP_GAP = 16
+
+def crop_regions():
+    """Returns (name, (x_min, y_min, x_max, y_max)) of every region to keep, in screen order."""
+    bio_region = (
+        min(region[1] for region in ocr.BIO_REGIONS),
+        min(region[3] for region in ocr.BIO_REGIONS),
+        max(region[2] for region in ocr.BIO_REGIONS),
+        max(region[4] for region in ocr.BIO_REGIONS),
+    )
+
+    regions = []
+    for name, (x_min, y_min, x_max, y_max) in [("bio", bio_region), ("panels", PANEL_REGION), ("select_prospect", SELECT_PROSPECT_REGION)]:
+        regions.append((name, (
+            max(0.0, x_min - REGION_MARGIN), max(0.0, y_min - REGION_MARGIN),
+            min(1.0, x_max + REGION_MARGIN), min(1.0, y_max + REGION_MARGIN),
+        )))
+    return regions
+
+def plan_crops(width, height, scale=0.5):
+    """Returns the crop plan for a width x height screenshot.
+
+    Each crop records its pixel box on the original screen ("box") and where it lands in the
+    downscaled composite image ("offset" and "size").
+    """
+    crops = []
+    composite_width = 0
+    y = 0
+
+    for name, (x_min, y_min, x_max, y_max) in crop_regions():
+        box = [round(x_min * width), round(y_min * height), round(x_max * width), round(y_max * height)]
+        size = [max(1, round((box[2] - box[0]) * scale)), max(1, round((box[3] - box[1]) * scale))]
+        crops.append({"name": name, "box": box, "offset": [0, y], "size": size})
+
+        composite_width = max(composite_width, size[0])
+        y += size[1] + CROP_GAP
+
+    return {"width": width, "height": height, "scale": scale, "composite": [composite_width, y - CROP_GAP], "crops": crops}
+
+def crop_screenshot(image_path, scale=0.5, quality=85):
+    """Crops, downscales and stacks the useful regions of a screenshot.
+
+    Returns (jpeg_bytes, plan), where plan is the plan_crops dict needed to remap the OCR result.
+    """
+    if Image is None:
+        raise RuntimeError("Cropping screenshots requires Pillow (pip install Pillow)")
+
+    with Image.open(image_path) as screenshot:
+        screenshot = screenshot.convert("RGB")
+        plan = plan_crops(screenshot.width, screenshot.height, scale)
+
+        composite = Image.new("RGB", tuple(plan["composite"]))
+        for crop in plan["crops"]:
+            region = screenshot.crop(tuple(crop["box"])).resize(tuple(crop["size"]), Image.LANCZOS)
+            composite.paste(region, tuple(crop["offset"]))
+
+    buffer = io.BytesIO()
+    composite.save(buffer, format="JPEG", quality=quality, optimize=True)
+    return buffer.getvalue(), plan
+
+def _crop_for_point(plan, y):
+    """Returns the crop whose band in the composite contains pixel row y, or the nearest one."""
+    def distance(crop):
+        top = crop["offset"][1]
+        bottom = top + crop["size"][1]
+        return 0 if top <= y <= bottom else min(abs(y - top), abs(y - bottom))
+    return min(plan["crops"], key=distance)
+
+def remap_vertices(vertices, plan):
+    """Maps normalized vertices on the composite image back to normalized vertices on the screenshot.
+
+    The crop is chosen once from the box's vertical center so all vertices move together.
+    """
+    composite_width, composite_height = plan["composite"]
+    center_y = sum(vertex["y"] for vertex in vertices) / len(vertices) * composite_height
+    crop = _crop_for_point(plan, center_y)
+
+    box, offset, size = crop["box"], crop["offset"], crop["size"]
+    x_ratio = (box[2] - box[0]) / size[0]
+    y_ratio = (box[3] - box[1]) / size[1]
+
+    return [
+        {
+            "x": (box[0] + (vertex["x"] * composite_width - offset[0]) * x_ratio) / plan["width"],
+            "y": (box[1] + (vertex["y"] * composite_height - offset[1]) * y_ratio) / plan["height"],
+        }
+        for vertex in vertices
+    ]
+
+def remap_ocr_result(data, plan):
+    """Rewrites the boxes of an OCR result made on a cropped composite into screenshot coordinates.
+
+    Lines and words are updated in place and the page dimensions are set back to the original
+    screenshot's. Returns data.
+    """
+    for page in data["pages"]:
+        for item in page.get("lines", []) + page.get("words", []):
+            polygon = item["boundingPolygon"]
+            polygon["normalizedVertices"] = remap_vertices(polygon["normalizedVertices"], plan)
+        page["dimensions"] = {"width": plan["width"], "height": plan["height"], "unit": "PIXEL"}
+    return data
+
+def project_ocr_result(data, plan):
+    """The inverse of remap_ocr_result: moves a full-screen OCR result into composite coordinates.
+
+    Lines whose center falls outside every crop are dropped, as OCR on the composite would not
+    see them, and words are removed. Returns a new result; the mock OCR service uses it to answer
+    cropped requests.
+    """
+    composite_width, composite_height = plan["composite"]
+    pages = []
+
+    for page in data["pages"]:
+        lines = []
+        for line in page.get("lines", []):
+            vertices = line["boundingPolygon"]["normalizedVertices"]
+            center_x = sum(vertex["x"] for vertex in vertices) / len(vertices) * plan["width"]
+            center_y = sum(vertex["y"] for vertex in vertices) / len(vertices) * plan["height"]
+
+            for crop in plan["crops"]:
+                box, offset, size = crop["box"], crop["offset"], crop["size"]
+                if box[0] <= center_x <= box[2] and box[1] <= center_y <= box[3]:
+                    x_ratio = size[0] / (box[2] - box[0])
+                    y_ratio = size[1] / (box[3] - box[1])
+                    projected = [
+                        {
+                            "x": (offset[0] + (vertex["x"] * plan["width"] - box[0]) * x_ratio) / composite_width,
+                            "y": (offset[1] + (vertex["y"] * plan["height"] - box[1]) * y_ratio) / composite_height,
+                        }
+                        for vertex in vertices
+                    ]
+                    lines.append(dict(line, boundingPolygon={"normalizedVertices": projected}))
+                    break
+
+        dimensions = {"width": composite_width, "height": composite_height, "unit": "PIXEL"}
+        pages.append(dict(page, dimensions=dimensions, lines=lines, words=[]))
+
+    return dict(data, pages=pages)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crops screenshots to the regions the extractors use, ready for OCR.")
+    parser.add_argument("images", nargs="+", help="screenshot files")
+    parser.add_argument("--out-dir", default="cropped", help="folder for the cropped images and their crop plans (default: cropped)")
+    parser.add_argument("--scale", type=float, default=0.5, help="downscale factor applied to the crops (default: 0.5)")
+    parser.add_argument("--quality", type=int, default=85, help="JPEG quality (default: 85)")
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    for image_path in args.images:
+        image_bytes, plan = crop_screenshot(image_path, args.scale, args.quality)
+        stem = os.path.join(args.out_dir, os.path.splitext(os.path.basename(image_path))[0])
+
+        with open(stem + ".jpg", "wb") as f:
+            f.write(image_bytes)
+        with open(stem + ".crops.json", "w") as f:
+            json.dump(plan, f, indent=2)
+
+        print(f"{image_path}: {os.path.getsize(image_path)} -> {len(image_bytes)} bytes")
@@ -0,0 +1,263 @@
+"""SQLite progression store for the rows extracted by ocr.py.
+
+Every run is recorded as a snapshot instead of overwriting the previous CSV, so player ratings
+can be compared across weeks with one indexed query:
+
+    players          one row per player, unique on (name, hometown, position)
+    snapshots        one row per run: when it was taken, an optional label and its source
+    player_snapshots the bio fields of a player as seen in one snapshot
+    attribute_values the attribute ratings, long-form: (snapshot, player, attribute) -> value
+
+    python ocr.py json --store progression.db --store-label "Week 3"
+    python ocr_store.py import progression.db 2028_Class.csv --label "Week 1"
+    python ocr_store.py history progression.db "AUSTIN CANTWELL" --attribute SPEED
+    python ocr_store.py movers progression.db --limit 10
+"""
+
+import argparse
+import csv
+import datetime
+import json
+import os
+import sqlite3
+import sys
+
+import ocr
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS players (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    hometown TEXT NOT NULL DEFAULT '',
+    position TEXT NOT NULL DEFAULT '',
+    UNIQUE (name, hometown, position)
+);
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    taken_at TEXT NOT NULL,
+    label TEXT,
+    source TEXT
+);
+CREATE INDEX IF NOT EXISTS snapshots_taken_at ON snapshots (taken_at);
+
+CREATE TABLE IF NOT EXISTS player_snapshots (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id) ON DELETE CASCADE,
+    player_id INTEGER NOT NULL REFERENCES players (id),
+    class TEXT,
+    state TEXT,
+    height_weight TEXT,
+    tendency TEXT,
+    star_rating INTEGER,
+    overall_rating INTEGER,
+    development_trait TEXT,
+    abilities TEXT,
+    mentals TEXT,
+    PRIMARY KEY (snapshot_id, player_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS attribute_values (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots (id) ON DELETE CASCADE,
+    player_id INTEGER NOT NULL REFERENCES players (id),
+    attribute TEXT NOT NULL,
+    value INTEGER,
+    PRIMARY KEY (snapshot_id, player_id, attribute)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS attribute_values_history ON attribute_values (player_id, attribute, snapshot_id);
+"""
+
+# Row fields stored in player_snapshots, in column order
+SNAPSHOT_FIELDS = [
+    ("class", "Class"), ("state", "State"), ("height_weight", "Height & Weight"), ("tendency", "Tendency"),
+    ("star_rating", "star_rating"), ("overall_rating", "overall_rating"), ("development_trait", "development_trait"),
+    ("abilities", "abilities"), ("mentals", "mentals"),
+]
+
+def open_store(db_path):
+    """Opens (creating if needed) the progression database and returns the connection."""
+    connection = sqlite3.connect(db_path)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.executescript(SCHEMA)
+    return connection
+
+def _player_key(row):
+    return (row.get("Name") or "", row.get("Hometown") or "", row.get("Position") or "")
+
+def _rating(value):
+    """Returns a rating as an int where it is numeric, the original text otherwise and None if empty."""
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return value
+
+def write_snapshot(connection, rows, taken_at=None, label=None, source=None):
+    """Records one run's rows as a new snapshot and returns its id.
+
+    Players are created on first sight. Rows without a name are skipped; if a player appears
+    twice in the same run, the later row wins. Everything is inserted in one transaction with
+    executemany, so a snapshot is either stored completely or not at all.
+    """
+    taken_at = taken_at or datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds")
+
+    # Later rows for the same player replace earlier ones
+    latest = {}
+    for row in rows:
+        key = _player_key(row)
+        if key[0]:
+            latest[key] = row
+
+    with connection:
+        snapshot_id = connection.execute(
+            "INSERT INTO snapshots (taken_at, label, source) VALUES (?, ?, ?)", (taken_at, label, source)
+        ).lastrowid
+
+        connection.executemany("INSERT OR IGNORE INTO players (name, hometown, position) VALUES (?, ?, ?)", latest.keys())
+        player_ids = {
+            key: connection.execute("SELECT id FROM players WHERE name = ? AND hometown = ? AND position = ?", key).fetchone()[0]
+            for key in latest
+        }
+
+        columns = ", ".join(column for column, _ in SNAPSHOT_FIELDS)
+        placeholders = ", ".join("?" for _ in SNAPSHOT_FIELDS)
+        connection.executemany(
+            f"INSERT INTO player_snapshots (snapshot_id, player_id, {columns}) VALUES (?, ?, {placeholders})",
+            (
+                [snapshot_id, player_ids[key]] + [
+                    _rating(row.get(field)) if column.endswith("_rating") else row.get(field) or None
+                    for column, field in SNAPSHOT_FIELDS
+                ]
+                for key, row in latest.items()
+            ),
+        )
+
+        connection.executemany(
+            "INSERT INTO attribute_values (snapshot_id, player_id, attribute, value) VALUES (?, ?, ?, ?)",
+            (
+                (snapshot_id, player_ids[key], attribute, _rating(value))
+                for key, row in latest.items()
+                for attribute, value in row.items()
+                if attribute not in ocr.BASE_FIELDNAMES and value not in (None, "")
+            ),
+        )
+
+    return snapshot_id
+
+def import_csv(connection, csv_path, taken_at=None, label=None):
+    """Records the rows of an existing player_data.csv-style file as a snapshot and returns its id."""
+    with open(csv_path, "r", newline="") as csvfile:
+        return write_snapshot(connection, csv.DictReader(csvfile), taken_at, label, source=os.path.abspath(csv_path))
+
+def _player_filter(name, hometown=None, position=None):
+    clauses = ["p.name = ?"]
+    params = [name]
+    if hometown is not None:
+        clauses.append("p.hometown = ?")
+        params.append(hometown)
+    if position is not None:
+        clauses.append("p.position = ?")
+        params.append(position)
+    return " AND ".join(clauses), params
+
+def player_history(connection, name, hometown=None, position=None, attribute=None):
+    """Returns a player's attribute ratings in every snapshot, oldest first.
+
+    Each entry is a dict with the player's hometown and position, the snapshot's taken_at and
+    label, the attribute and its value. hometown and position tell apart players who share a
+    name; attribute limits the history to one rating.
+    """
+    where, params = _player_filter(name, hometown, position)
+    if attribute is not None:
+        where += " AND a.attribute = ?"
+        params.append(attribute)
+
+    query = f"""
+        SELECT p.name, p.hometown, p.position, s.taken_at, s.label, a.attribute, a.value
+        FROM players p
+        JOIN attribute_values a ON a.player_id = p.id
+        JOIN snapshots s ON s.id = a.snapshot_id
+        WHERE {where}
+        ORDER BY s.taken_at, s.id, a.attribute
+    """
+    return [dict(row) for row in connection.execute(query, params)]
+
+def latest_snapshots(connection, count=2):
+    """Returns the ids of the most recent snapshots, newest first."""
+    return [row[0] for row in connection.execute("SELECT id FROM snapshots ORDER BY taken_at DESC, id DESC LIMIT ?", (count,))]
+
+def biggest_movers(connection, current=None, previous=None, attribute=None, limit=20):
+    """Returns the largest rating changes between two snapshots, biggest absolute change first.
+
+    By default the latest snapshot is compared with the one before it (week over week). Each
+    entry is a dict with the player, attribute, previous and current value and the change.
+    Only numeric ratings present in both snapshots are compared; unchanged ones are left out.
+    """
+    if current is None or previous is None:
+        latest = latest_snapshots(connection)
+        if len(latest) < 2:
+            return []
+        current = latest[0] if current is None else current
+        previous = latest[1] if previous is None else previous
+
+    params = [previous, current]
+    where = ""
+    if attribute is not None:
+        where = "AND cur.attribute = ?"
+        params.append(attribute)
+    params.append(limit)
+
+    query = f"""
+        SELECT p.name, p.hometown, p.position, cur.attribute,
+               prev.value AS previous, cur.value AS current, cur.value - prev.value AS change
+        FROM attribute_values cur
+        JOIN attribute_values prev
+          ON prev.snapshot_id = ? AND prev.player_id = cur.player_id AND prev.attribute = cur.attribute
+        JOIN players p ON p.id = cur.player_id
+        WHERE cur.snapshot_id = ? AND typeof(cur.value) = 'integer' AND typeof(prev.value) = 'integer' AND cur.value != prev.value {where}
+        ORDER BY abs(cur.value - prev.value) DESC, p.name, cur.attribute
+        LIMIT ?
+    """
+    return [dict(row) for row in connection.execute(query, params)]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Queries and fills the SQLite progression store.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    importer = commands.add_parser("import", help="record existing CSV files as snapshots")
+    importer.add_argument("db", help="progression database")
+    importer.add_argument("csv_files", nargs="+", help="player_data.csv-style files, one snapshot each")
+    importer.add_argument("--label", help="snapshot label (default: the file name)")
+    importer.add_argument("--taken-at", help="snapshot time, ISO 8601 (default: the file's mtime)")
+
+    history = commands.add_parser("history", help="print a player's ratings across snapshots")
+    history.add_argument("db", help="progression database")
+    history.add_argument("name", help="player name as it appears in the CSV")
+    history.add_argument("--hometown")
+    history.add_argument("--position")
+    history.add_argument("--attribute")
+
+    movers = commands.add_parser("movers", help="print the biggest rating changes between two snapshots")
+    movers.add_argument("db", help="progression database")
+    movers.add_argument("--current", type=int, help="snapshot id (default: the latest)")
+    movers.add_argument("--previous", type=int, help="snapshot id to compare with (default: the one before the latest)")
+    movers.add_argument("--attribute")
+    movers.add_argument("--limit", type=int, default=20, help="number of changes to print (default: 20)")
+
+    args = parser.parse_args()
+    connection = open_store(args.db)
+
+    if args.command == "import":
+        for csv_path in args.csv_files:
+            taken_at = args.taken_at or datetime.datetime.fromtimestamp(os.path.getmtime(csv_path), datetime.timezone.utc).isoformat(timespec="seconds")
+            snapshot_id = import_csv(connection, csv_path, taken_at, args.label or os.path.basename(csv_path))
+            print(f"Imported {csv_path} as snapshot {snapshot_id}")
+    elif args.command == "history":
+        json.dump(player_history(connection, args.name, args.hometown, args.position, args.attribute), sys.stdout, indent=2)
+        print()
+    else:
+        json.dump(biggest_movers(connection, args.current, args.previous, args.attribute, args.limit), sys.stdout, indent=2)
+        print()
+
+    connection.close()
@@ -0,0 +1,460 @@
+"""Submits recruiting screenshots to an OCR service and streams the results into ocr.py's extractors.
+
+Images are sent concurrently over a small pool of keep-alive HTTP connections, with a bounded
+number of requests in flight and retries with exponential backoff for throttling (429), server
+errors and dropped connections. Each result is extracted as soon as it arrives; the raw OCR JSON
+can also be saved so the regular `python ocr.py` pipeline can re-read it later.
+
+With --crop, each screenshot is first cut down to the regions the extractors read and
+downscaled (see ocr_preprocess.py), which makes the upload a fraction of its size; the OCR boxes
+are mapped back to full-screen coordinates before extraction.
+
+The request body follows the Oracle Cloud Vision AnalyzeDocument shape (inline base64 image,
+TEXT_EXTRACTION feature). OCI request signing is not done here: point --endpoint at a signing
+proxy or pass the required headers with --header.
+
+A local stand-in service replays the sample results in json/ so the stage can be tested and
+benchmarked offline:
+
+    python ocr_submit.py serve-mock --port 8765
+    python ocr_submit.py submit image.png 1917c549cbe40-screenshotUrl.jpg --endpoint http://127.0.0.1:8765/
+    python ocr_submit.py submit *.png --mock --concurrency 16
+    python ocr_submit.py submit *.png --mock --crop
+"""
+
+import argparse
+import asyncio
+import base64
+import concurrent.futures
+import glob
+import hashlib
+import http.server
+import json
+import os
+import random
+import ssl
+import sys
+import threading
+import time
+import urllib.parse
+
+import ocr
+import ocr_preprocess
+
+# HTTP statuses that are worth retrying
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+# Path of the AnalyzeDocument action, appended when --endpoint is a bare host
+ANALYZE_DOCUMENT_PATH = "/20220125/actions/analyzeDocument"
+
+class SubmitError(Exception):
+    """Raised when an image could not be analyzed, after any retries."""
+
+class ConnectionPool:
+    """A fixed-size pool of keep-alive HTTP/1.1 connections to one host.
+
+    At most `size` requests are in flight at once; idle connections are reused by the next
+    request instead of opening a new socket.
+    """
+
+    def __init__(self, url, size=8):
+        parts = urllib.parse.urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        self.path = parts.path if parts.path not in ("", "/") else ANALYZE_DOCUMENT_PATH
+        if parts.query:
+            self.path += "?" + parts.query
+
+        self._slots = asyncio.Semaphore(size)
+        self._idle = []
+
+    async def request(self, method, headers, body):
+        """Sends one request on a pooled connection and returns (status, headers, body)."""
+        async with self._slots:
+            if self._idle:
+                reader, writer = self._idle.pop()
+            else:
+                reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+
+            try:
+                head = [f"{method} {self.path} HTTP/1.1", f"Host: {self.host}", f"Content-Length: {len(body)}"]
+                head += [f"{name}: {value}" for name, value in headers.items()]
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+                await writer.drain()
+
+                status, response_headers, response_body, keep_alive = await _read_response(reader)
+            except BaseException:
+                writer.close()
+                raise
+
+            if keep_alive:
+                self._idle.append((reader, writer))
+            else:
+                writer.close()
+
+            return status, response_headers, response_body
+
+    async def close(self):
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+async def _read_response(reader):
+    """Reads one HTTP/1.1 response; returns (status, headers, body, keep_alive).
+
+    A malformed status line or chunk size raises ConnectionError, so the request is retried
+    like any other dropped connection.
+    """
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("connection closed by server")
+    try:
+        version, status = status_line.split()[:2]
+        status = int(status)
+    except ValueError:
+        raise ConnectionError(f"malformed status line {status_line[:100]!r}")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    # HTTP/1.0 connections close after the response unless the server asks to keep them
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection == "keep-alive" if version == b"HTTP/1.0" else connection != "close"
+
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        chunks = []
+        while True:
+            size_line = await reader.readline()
+            try:
+                size = int(size_line.split(b";")[0], 16)
+            except ValueError:
+                raise ConnectionError(f"malformed chunk size {size_line[:100]!r}")
+            if size == 0:
+                # Skip any trailer fields up to the blank line that ends the body
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readline()
+        body = b"".join(chunks)
+    elif "content-length" in headers:
+        body = await reader.readexactly(int(headers["content-length"]))
+    else:
+        body = await reader.read()
+        keep_alive = False
+
+    return status, headers, body, keep_alive
+
+def build_analyze_request(image_bytes, compartment_id=None):
+    """Returns the AnalyzeDocument request body for one image."""
+    body = {
+        "features": [{"featureType": "TEXT_EXTRACTION"}],
+        "document": {"source": "INLINE", "data": base64.b64encode(image_bytes).decode("ascii")},
+    }
+    if compartment_id:
+        body["compartmentId"] = compartment_id
+    return json.dumps(body).encode()
+
+async def analyze_image(pool, image_bytes, label, headers=None, compartment_id=None, retries=4, backoff=0.5, timeout=60.0):
+    """Sends one image to the OCR service and returns the raw result bytes.
+
+    Throttling, server errors, timeouts and dropped connections are retried up to `retries`
+    times, waiting backoff * 2**attempt seconds (with jitter, or the server's Retry-After).
+    label names the image in error messages.
+    """
+    body = build_analyze_request(image_bytes, compartment_id)
+
+    request_headers = {"Content-Type": "application/json", "Accept": "application/json"}
+    request_headers.update(headers or {})
+
+    for attempt in range(retries + 1):
+        retry_after = None
+        try:
+            status, response_headers, payload = await asyncio.wait_for(pool.request("POST", request_headers, body), timeout)
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
+            error = f"{type(e).__name__}: {e}"
+        else:
+            if status == 200:
+                return payload
+            error = f"HTTP {status}"
+            if status not in RETRY_STATUSES:
+                raise SubmitError(f"{label}: {error}")
+            retry_after = response_headers.get("retry-after")
+
+        if attempt == retries:
+            break
+
+        try:
+            delay = float(retry_after)
+        except (TypeError, ValueError):
+            delay = backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+        await asyncio.sleep(delay)
+
+    raise SubmitError(f"{label}: gave up after {retries + 1} attempts ({error})")
+
+def read_image(image_path, crop_scale=None):
+    """Returns (image_bytes, crop_plan) for one screenshot; crop_plan is None unless it was cropped."""
+    if crop_scale:
+        return ocr_preprocess.crop_screenshot(image_path, crop_scale)
+    with open(image_path, "rb") as f:
+        return f.read(), None
+
+def remap_raw_result(raw, plan):
+    """Returns the raw OCR result of a cropped image with its boxes mapped back to the full screen."""
+    return json.dumps(ocr_preprocess.remap_ocr_result(json.loads(raw), plan)).encode()
+
+def result_name(image_path):
+    """Returns the file name an image's OCR result is saved and reported under."""
+    return os.path.splitext(os.path.basename(image_path))[0] + ".json"
+
+def duplicate_result_names(image_paths):
+    """Returns the result names shared by more than one image, e.g. a/x.png and b/x.jpg."""
+    seen = set()
+    duplicates = set()
+    for image_path in image_paths:
+        name = result_name(image_path)
+        if name in seen:
+            duplicates.add(name)
+        seen.add(name)
+    return sorted(duplicates)
+
+def parse_header(value):
+    """argparse type for --header: returns (name, value) from "Name: value"."""
+    name, separator, header_value = value.partition(":")
+    if not separator or not name.strip():
+        raise argparse.ArgumentTypeError(f"expected NAME:VALUE, got {value!r}")
+    if "\r" in value or "\n" in value:
+        raise argparse.ArgumentTypeError("header must not contain line breaks")
+    return name.strip(), header_value.strip()
+
+async def iter_submitted_results(image_paths, endpoint, concurrency=8, headers=None, compartment_id=None, retries=4, backoff=0.5, timeout=60.0, json_dir=None, options=None, executor=None, crop_scale=None):
+    """Analyzes every image and yields its ocr.process_json_file results as soon as they are ready.
+
+    Images complete in any order; each result (one per page of the OCR response) is tagged
+    with its "image" path. Cropping, remapping and extraction run in executor (the default
+    thread pool if None) so they never stall the network loop. With crop_scale, images are
+    cropped and downscaled by that factor before upload. A failed submission yields one result
+    with only "error" set.
+
+    With json_dir, raises ValueError if two images would save their result under the same
+    name (see duplicate_result_names).
+    """
+    if json_dir:
+        duplicates = duplicate_result_names(image_paths)
+        if duplicates:
+            raise ValueError(f"several images would be saved as {', '.join(duplicates)} in {json_dir}")
+
+    loop = asyncio.get_running_loop()
+    pool = ConnectionPool(endpoint, concurrency)
+    pending = list(reversed(image_paths))
+    results = asyncio.Queue()
+
+    async def worker():
+        while pending:
+            image_path = pending.pop()
+            name = result_name(image_path)
+            try:
+                image_bytes, plan = await loop.run_in_executor(executor, read_image, image_path, crop_scale)
+                raw = await analyze_image(pool, image_bytes, os.path.basename(image_path), headers, compartment_id, retries, backoff, timeout)
+                if plan is not None:
+                    raw = await loop.run_in_executor(executor, remap_raw_result, raw, plan)
+                if json_dir:
+                    with open(os.path.join(json_dir, name), "wb") as f:
+                        f.write(raw)
+                image_results = await loop.run_in_executor(executor, ocr.process_json_file, name, options, False, raw)
+            except Exception as e:
+                image_results = [ocr.new_result(name) | {"error": f"Error submitting {os.path.basename(image_path)}: {e}"}]
+            for result in image_results:
+                result["image"] = image_path
+            await results.put(image_results)
+
+    workers = [asyncio.create_task(worker()) for _ in range(min(concurrency, len(image_paths)))]
+    try:
+        for _ in range(len(image_paths)):
+            for result in await results.get():
+                yield result
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        await pool.close()
+
+async def submit_images(image_paths, endpoint, output_path="player_data.csv", extract_workers=0, **kwargs):
+    """Submits the images, extracts each result as it arrives and writes the rows to output_path.
+
+    Rows are written in image path order (and page order within a multi-page response), like
+    a folder run. With extract_workers > 0 the extraction runs in that many processes. Returns
+    a summary dict.
+    """
+    start = time.perf_counter()
+    image_paths = sorted(image_paths)
+    rows = {}
+    all_attribute_keys = set()
+    errors = []
+
+    executor = concurrent.futures.ProcessPoolExecutor(extract_workers) if extract_workers > 0 else None
+    try:
+        async for result in iter_submitted_results(image_paths, endpoint, executor=executor, **kwargs):
+            all_attribute_keys.update(result["attribute_keys"])
+            if result["error"] is not None:
+                errors.append(result["error"])
+                print(result["error"])
+            elif result["row"] is not None:
+                rows.setdefault(result["image"], []).append(result["row"])
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if all_attribute_keys:
+        ocr.write_player_csv(output_path, (row for path in image_paths for row in rows.get(path, [])), all_attribute_keys)
+
+    seconds = time.perf_counter() - start
+    return {
+        "images": len(image_paths),
+        "rows": sum(len(image_rows) for image_rows in rows.values()),
+        "errors": len(errors),
+        "seconds": round(seconds, 3),
+        "images_per_sec": round(len(image_paths) / seconds, 1) if seconds > 0 else None,
+    }
+
+class MockVisionHandler(http.server.BaseHTTPRequestHandler):
+    """Answers every POST with one of the sample OCR results, chosen by a hash of the request body."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        server = self.server
+
+        with server.lock:
+            server.requests += 1
+
+        if server.latency:
+            time.sleep(random.uniform(0.5, 1.5) * server.latency)
+
+        if random.random() < server.failure_rate:
+            self._respond(503, b'{"code": "TooManyRequests"}', {"Retry-After": "0"})
+            return
+
+        sample = server.samples[int(hashlib.sha1(body).hexdigest(), 16) % len(server.samples)]
+        self._respond(200, sample)
+
+    def _respond(self, status, payload, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_mock_server(samples_dir=None, host="127.0.0.1", port=0, latency=0.0, failure_rate=0.0, crop_scale=None):
+    """Starts the mock OCR service in a background thread and returns the server.
+
+    It replays the sample results in samples_dir (json/ by default), optionally after `latency`
+    seconds and failing `failure_rate` of the requests with 503 to exercise retries. With
+    crop_scale the samples are first projected onto the composite images that --crop uploads.
+    The bound address is server.server_address; call server.shutdown() to stop it.
+    """
+    samples_dir = samples_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), "json")
+    samples = []
+    for file_path in sorted(glob.glob(os.path.join(samples_dir, "*.json"))):
+        with open(file_path, "rb") as f:
+            sample = f.read()
+        if crop_scale:
+            data = json.loads(sample)
+            dimensions = data["pages"][0]["dimensions"]
+            plan = ocr_preprocess.plan_crops(dimensions["width"], dimensions["height"], crop_scale)
+            sample = json.dumps(ocr_preprocess.project_ocr_result(data, plan)).encode()
+        samples.append(sample)
+    if not samples:
+        raise SystemExit(f"No sample OCR results found in {samples_dir}")
+
+    server = http.server.ThreadingHTTPServer((host, port), MockVisionHandler)
+    server.daemon_threads = True
+    server.samples = samples
+    server.latency = latency
+    server.failure_rate = failure_rate
+    server.requests = 0
+    server.lock = threading.Lock()
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Submits screenshots for OCR and extracts player data from the results.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    submit = commands.add_parser("submit", help="analyze images and write their rows to a CSV")
+    submit.add_argument("images", nargs="+", help="screenshot files to analyze")
+    target = submit.add_mutually_exclusive_group(required=True)
+    target.add_argument("--endpoint", help="OCR service URL (a bare host gets the AnalyzeDocument path)")
+    target.add_argument("--mock", action="store_true", help="start the local mock service and submit to it")
+    submit.add_argument("--header", type=parse_header, action="append", default=[], metavar="NAME:VALUE", help="extra request header, e.g. for a signing proxy")
+    submit.add_argument("--compartment-id", help="OCI compartment OCID to include in the request")
+    submit.add_argument("--concurrency", type=int, default=8, help="maximum requests in flight (default: 8)")
+    submit.add_argument("--retries", type=int, default=4, help="retries per image (default: 4)")
+    submit.add_argument("--backoff", type=float, default=0.5, help="initial retry delay in seconds (default: 0.5)")
+    submit.add_argument("--timeout", type=float, default=60.0, help="per-request timeout in seconds (default: 60)")
+    submit.add_argument("--json-dir", help="also save each raw OCR result in this folder")
+    submit.add_argument("--crop", action="store_true", help="crop and downscale screenshots before upload (needs Pillow)")
+    submit.add_argument("--crop-scale", type=float, default=0.5, help="with --crop, downscale factor (default: 0.5)")
+    submit.add_argument("--output", default="player_data.csv", help="CSV file to write (default: player_data.csv)")
+    submit.add_argument("--extract-workers", type=int, default=0, help="processes used for extraction (default: run in a thread)")
+    submit.add_argument("--attribute-matcher", choices=["spatial", "window"], default="spatial", help="see ocr.py (default: spatial)")
+    submit.add_argument("--mock-latency", type=float, default=0.0, help="with --mock, average seconds per response")
+    submit.add_argument("--mock-failure-rate", type=float, default=0.0, help="with --mock, share of requests answered with 503")
+
+    serve = commands.add_parser("serve-mock", help="run the local mock OCR service")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--samples", help="folder of OCR results to replay (default: json/)")
+    serve.add_argument("--latency", type=float, default=0.0, help="average seconds per response")
+    serve.add_argument("--failure-rate", type=float, default=0.0, help="share of requests answered with 503")
+    serve.add_argument("--crop-scale", type=float, help="answer as if 3840x2160 images were sent with --crop at this scale")
+
+    args = parser.parse_args()
+
+    if args.command == "serve-mock":
+        server = start_mock_server(args.samples, args.host, args.port, args.latency, args.failure_rate, args.crop_scale)
+        print(f"Mock OCR service listening on http://{args.host}:{server.server_address[1]}/ (Ctrl+C to stop)")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            server.shutdown()
+        sys.exit(0)
+
+    if args.json_dir:
+        duplicates = duplicate_result_names(args.images)
+        if duplicates:
+            parser.error(f"several images would be saved as {', '.join(duplicates)} in --json-dir; rename them first")
+        os.makedirs(args.json_dir, exist_ok=True)
+
+    endpoint = args.endpoint
+    server = None
+    if args.mock:
+        server = start_mock_server(latency=args.mock_latency, failure_rate=args.mock_failure_rate, crop_scale=args.crop_scale if args.crop else None)
+        endpoint = f"http://127.0.0.1:{server.server_address[1]}/"
+
+    summary = asyncio.run(submit_images(
+        args.images, endpoint, output_path=args.output, extract_workers=args.extract_workers,
+        concurrency=args.concurrency, headers=dict(args.header),
+        compartment_id=args.compartment_id, retries=args.retries, backoff=args.backoff, timeout=args.timeout,
+        json_dir=args.json_dir, options={"attribute_matcher": args.attribute_matcher},
+        crop_scale=args.crop_scale if args.crop else None,
+    ))
+
+    if server is not None:
+        summary["requests"] = server.requests
+        server.shutdown()
+
+    print(json.dumps(summary, indent=2))
@@ -0,0 +1,256 @@
+"""Watch-folder mode for ocr.py: ingests new or modified OCR results while a play session runs.
+
+New *.json files are picked up with inotify on Linux (falling back to polling the folder
+elsewhere), debounced until they stop changing, extracted in micro-batches and appended to
+the CSV without rewriting it. The incremental-run manifest is kept up to date, so files that
+were already ingested are skipped and a later `python ocr.py --incremental` rebuilds the CSV.
+"""
+
+import csv
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+import ocr
+
+# inotify flags, from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# struct inotify_event header: wd, mask, cookie, len
+_EVENT_HEADER = struct.Struct("iIII")
+
+# Files handed to the extractors in one micro-batch at most
+WATCH_BATCH_SIZE = 200
+
+# Attribute columns seen on the recruiting screens so far (see 2028_Class.csv). A watched CSV
+# starts with all of them so rows appended later rarely bring a column the header lacks.
+KNOWN_ATTRIBUTE_KEYS = [
+    'ACCELERATION', 'AGILITY', 'AWARENESS', 'BC VISION', 'BLOCK SHEDDING', 'BREAK SACK', 'BREAK TACKLE',
+    'CARRYING', 'CATCH IN TRAFFIC', 'CATCHING', 'CHANGE OF DIRECTION', 'DEEP ACCURACY', 'DEEP ROUTE',
+    'FINESSE MOVES', 'HIT POWER', 'IMPACT BLOCKING', 'JUKE MOVE', 'KICK ACCURACY', 'KICK POWER', 'LEAD BLOCK',
+    'MAN COVERAGE', 'MEDIUM ACCURACY', 'MEDIUM ROUTE', 'PASS BLOCK', 'PASS BLOCK FINESSE', 'PASS BLOCK POWER',
+    'PLAY RECOGNITION', 'POWER MOVES', 'PRESS', 'PURSUIT', 'RELEASE', 'RUN BLOCK', 'RUN BLOCK FINESSE',
+    'SHORT ACCURACY', 'SPECTACULAR CATCH', 'SPEED', 'SPIN MOVE', 'STRENGTH', 'TACKLE', 'THROW ON RUN',
+    'THROW POWER', 'UNDER PRESSURE', 'ZONE COVERAGE',
+]
+
+class InotifyWatcher:
+    """Reports *.json files in a folder that were closed after writing or moved into it (Linux only)."""
+
+    def __init__(self, folder_path):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        if libc.inotify_add_watch(self.fd, os.fsencode(folder_path), IN_CLOSE_WRITE | IN_MOVED_TO) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"cannot watch {folder_path}")
+
+        self.folder_path = folder_path
+
+    def wait(self, timeout=None):
+        """Blocks until events arrive or timeout seconds pass; returns the changed *.json names.
+
+        If the kernel event queue overflowed, every *.json in the folder is returned so nothing
+        is missed (the manifest skips the unchanged ones).
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        names = set()
+        while True:
+            try:
+                buffer = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+
+            offset = 0
+            while offset < len(buffer):
+                _, mask, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+                offset += _EVENT_HEADER.size
+                name = buffer[offset:offset + length].rstrip(b"\0").decode(errors="surrogateescape")
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    names.update(_json_names(self.folder_path))
+                elif name.endswith(".json"):
+                    names.add(name)
+
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+class PollingWatcher:
+    """Reports *.json files in a folder whose size or mtime changed since the previous scan."""
+
+    def __init__(self, folder_path, interval=2.0):
+        self.folder_path = folder_path
+        self.interval = interval
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        snapshot = {}
+        for entry in os.scandir(self.folder_path):
+            if entry.name.endswith(".json") and entry.is_file():
+                stat = entry.stat()
+                snapshot[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def wait(self, timeout=None):
+        """Sleeps for one polling interval (or timeout if shorter) and returns the changed *.json names."""
+        time.sleep(self.interval if timeout is None else min(timeout, self.interval))
+
+        snapshot = self._scan()
+        names = {name for name, fingerprint in snapshot.items() if self.snapshot.get(name) != fingerprint}
+        self.snapshot = snapshot
+        return names
+
+    def close(self):
+        pass
+
+def open_watcher(folder_path, poll_interval=2.0):
+    """Returns an InotifyWatcher for the folder, or a PollingWatcher where inotify is unavailable."""
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(folder_path)
+        except (OSError, AttributeError, TypeError):
+            pass
+    return PollingWatcher(folder_path, poll_interval)
+
+def _json_names(folder_path):
+    return {name for name in os.listdir(folder_path) if name.endswith(".json")}
+
+def read_csv_header(output_path):
+    """Returns the header row of an existing CSV file, or None if it is missing or empty."""
+    try:
+        with open(output_path, "r", newline="") as csvfile:
+            return next(csv.reader(csvfile), None)
+    except FileNotFoundError:
+        return None
+
+def append_rows(output_path, rows):
+    """Appends rows to the CSV under its existing header and returns attribute columns the header lacks.
+
+    Values for columns that are not in the header are left out; they stay in the manifest and
+    appear once the CSV is rebuilt with `python ocr.py --incremental`.
+    """
+    fieldnames = read_csv_header(output_path)
+    if fieldnames is None:
+        attribute_keys = {key for row in rows for key in row if key not in ocr.BASE_FIELDNAMES}
+        ocr.write_player_csv(output_path, rows, attribute_keys | set(KNOWN_ATTRIBUTE_KEYS))
+        return set()
+
+    missing = {key for row in rows for key in row if key not in fieldnames}
+
+    with open(output_path, "a", newline="") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames, extrasaction="ignore")
+        writer.writerows(rows)
+
+    return missing
+
+def ingest_batch(folder_path, names, output_path, manifest, manifest_path, workers=1, options=None, verbose=False):
+    """Extracts one micro-batch of files, appends their rows to the CSV and saves the manifest.
+
+    Files whose content is unchanged according to the manifest are skipped. Returns the number
+    of rows appended.
+    """
+    file_paths = [os.path.join(folder_path, name) for name in sorted(names) if os.path.isfile(os.path.join(folder_path, name))]
+
+    rows = []
+    for result in ocr.iter_incremental_results(file_paths, manifest, workers, options, prune=False):
+        if result.get("cached"):
+            continue
+        if verbose:
+            print(f"Processing file: {ocr.page_label(result)}")
+        if result["error"] is not None:
+            print(result["error"])
+        elif result["row"] is not None:
+            rows.append(result["row"])
+
+    if rows:
+        missing = append_rows(output_path, rows)
+        if missing:
+            print(f"New attribute column(s) not in {output_path}: {', '.join(sorted(missing))}. "
+                  f"Run `python ocr.py --incremental` to rebuild it with every column.")
+
+    ocr.save_manifest(manifest, manifest_path)
+    return len(rows)
+
+def watch_folder(folder_path, output_path="player_data.csv", workers=1, options=None, debounce=1.0, poll_interval=2.0, verbose=False):
+    """Keeps output_path up to date with the OCR results dropped into folder_path until interrupted.
+
+    Starts with an incremental run so the CSV covers every file already in the folder, then
+    waits for new or modified *.json files. A file is ingested once it has been quiet for
+    `debounce` seconds, together with every other file that is ready, in batches of at most
+    WATCH_BATCH_SIZE. Between batches the process blocks in the watcher and uses no CPU.
+
+    The watcher is opened before the catch-up run, so files dropped during it are reported
+    afterwards (the manifest skips the ones the run already covered). A batch that fails with
+    an OSError, e.g. a file removed while it was read or a CSV that cannot be appended to, is
+    reported and retried after the next debounce period.
+    """
+    manifest_path = ocr.default_manifest_path(output_path)
+    watcher = open_watcher(folder_path, poll_interval)
+
+    # File name -> time of its last change event
+    pending = {}
+
+    try:
+        # Catch up with whatever arrived while we were not running
+        ocr.process_json_files_in_folder(
+            folder_path, output_path=output_path, workers=workers, incremental=True, options=options,
+            verbose=verbose, extra_attribute_keys=KNOWN_ATTRIBUTE_KEYS,
+        )
+        manifest = ocr.load_manifest(manifest_path, options)
+        print(f"Watching {folder_path} with {type(watcher).__name__} (Ctrl+C to stop)")
+
+        while True:
+            if pending:
+                now = time.monotonic()
+                timeout = max(0.0, min(pending.values()) + debounce - now)
+            else:
+                timeout = None
+
+            for name in watcher.wait(timeout):
+                pending[name] = time.monotonic()
+
+            now = time.monotonic()
+            ready = sorted(name for name, changed in pending.items() if now - changed >= debounce)
+
+            for start in range(0, len(ready), WATCH_BATCH_SIZE):
+                batch = ready[start:start + WATCH_BATCH_SIZE]
+                for name in batch:
+                    del pending[name]
+
+                try:
+                    appended = ingest_batch(folder_path, batch, output_path, manifest, manifest_path, workers, options, verbose)
+                except OSError as e:
+                    print(f"Could not ingest {len(batch)} file(s), retrying: {e}")
+
+                    # Forget what the failed batch recorded, it never reached the CSV
+                    manifest = ocr.load_manifest(manifest_path, options)
+                    now = time.monotonic()
+                    for name in batch:
+                        pending.setdefault(name, now)
+                    continue
+
+                print(f"Ingested {len(batch)} file(s), appended {appended} row(s) to {output_path}")
+    except KeyboardInterrupt:
+        print("Stopped watching.")
+    finally:
+        watcher.close()
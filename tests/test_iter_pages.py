@@ -0,0 +1,84 @@
+"""Checks the page-by-page JSON walker (ocr._iter_pages_stdlib) against decode_lean_json_data."""
+
+import json
+import unittest
+from unittest import mock
+
+import ocr
+
+def _line(text, x, y):
+    vertices = [{"x": x, "y": y}, {"x": x + 0.1, "y": y}, {"x": x + 0.1, "y": y + 0.02}, {"x": x, "y": y + 0.02}]
+    return {"text": text, "confidence": 0.99, "boundingPolygon": {"normalizedVertices": vertices}}
+
+def _page(number):
+    return {
+        "pageNumber": number,
+        "dimensions": {"width": 3840.0, "height": 2160.0, "unit": "PIXEL"},
+        "detectedLanguages": [],
+        "lines": [_line(f"LINE {number}.{i}", 0.1 * i, 0.05 * i) for i in range(5)],
+        "words": [_line("word", 0.5, 0.5)],
+    }
+
+def _document(pages=3):
+    return {"documentMetadata": {"pageCount": pages, "mimeType": "image/png"}, "pages": [_page(n + 1) for n in range(pages)], "errors": None}
+
+def _stdlib_pages(raw):
+    return [ocr._lean_page(page) for page in ocr._iter_pages_stdlib(raw)]
+
+class IterPagesStdlibTest(unittest.TestCase):
+    def assertSamePages(self, raw):
+        self.assertEqual(_stdlib_pages(raw), ocr.decode_lean_json_data(raw)["pages"])
+
+    def test_compact(self):
+        self.assertSamePages(json.dumps(_document(), separators=(",", ":")).encode())
+
+    def test_pretty(self):
+        self.assertSamePages(json.dumps(_document(), indent=2).encode())
+
+    def test_crlf_and_tabs(self):
+        raw = json.dumps(_document(), indent="\t").replace("\n", "\r\n").encode()
+        self.assertSamePages(raw)
+
+    def test_pages_first(self):
+        document = _document()
+        reordered = {"pages": document.pop("pages"), **document}
+        self.assertSamePages(json.dumps(reordered, indent=2).encode())
+
+    def test_unicode_text(self):
+        document = _document(1)
+        document["pages"][0]["lines"][0]["text"] = "Dunçanville, TX – 6' 3\""
+        self.assertSamePages(json.dumps(document, ensure_ascii=False).encode("utf-8"))
+
+    def test_empty_pages(self):
+        self.assertSamePages(b'{"documentMetadata": {}, "pages": [ ]}')
+        self.assertSamePages(b'{"pages":[]}')
+
+    def test_missing_pages(self):
+        self.assertEqual(_stdlib_pages(b'{"documentMetadata": {"pageCount": 0}}'), [])
+        self.assertEqual(_stdlib_pages(b"{ }"), [])
+
+    def test_truncated(self):
+        raw = json.dumps(_document(), indent=2).encode()
+        cut = raw.index(b'"pageNumber": 3')
+
+        pages = ocr._iter_pages_stdlib(raw[:cut])
+        self.assertEqual([page["pageNumber"] for page in (next(pages), next(pages))], [1, 2])
+        with self.assertRaises(json.JSONDecodeError):
+            next(pages)
+
+        for end in (0, 1, len(raw) // 2, len(raw) - 1):
+            with self.assertRaises(json.JSONDecodeError):
+                _stdlib_pages(raw[:end])
+
+    def test_not_an_object(self):
+        for raw in (b"[]", b'"pages"', b"{1: 2}", b'{"pages": {}}'):
+            with self.assertRaises(json.JSONDecodeError):
+                _stdlib_pages(raw)
+
+    def test_iter_json_pages_streams_without_ijson(self):
+        raw = json.dumps(_document(4), indent=2).encode()
+        with mock.patch.object(ocr, "STREAM_MIN_SIZE", 0), mock.patch.object(ocr, "ijson", None):
+            self.assertEqual(list(ocr.iter_json_pages(raw)), ocr.decode_lean_json_data(raw)["pages"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+"""Checks layout template validation, compilation and the RegionTable grid lookup."""
+
+import unittest
+
+import ocr
+
+def _page(lines, width=3840, height=2160):
+    """Builds a PageIndex from (text, x0, y0, x2, y2) boxes."""
+    page = ocr.PageIndex(dimensions={"width": width, "height": height, "unit": "PIXEL"})
+    for text, x0, y0, x2, y2 in lines:
+        page.add_line(text, x0, y0, x2, x2, y2, x0)
+    page.finish()
+    return page
+
+def _template(**changes):
+    template = {"name": "test", "regions": [{"field": "Name", "x": [0.1, 0.2], "y": [0.1, 0.2]}]}
+    template.update(changes)
+    return template
+
+class CheckLayoutTest(unittest.TestCase):
+    def test_default_layout_is_valid(self):
+        ocr.check_layout(ocr.DEFAULT_LAYOUT)
+
+    def test_rejects_malformed_templates(self):
+        region = {"field": "Name", "x": [0.1, 0.2], "y": [0.1, 0.2]}
+        malformed = [
+            ["not", "an", "object"],
+            _template(dimensions=[3840, 2160]),
+            _template(dimensions=[[3840]]),
+            _template(dimensions=[["3840", "2160"]]),
+            _template(requires="TRANSFER PORTAL"),
+            _template(requires=[1]),
+            _template(units="inches"),
+            _template(tolerances={"value_dy": 0.1}),
+            _template(tolerances={"value_dx": -1}),
+            _template(tolerances=[0.1]),
+            _template(regions=[]),
+            _template(regions=[dict(region, x=[0.2, 0.1])]),
+            _template(regions=[dict(region, y=[0.1])]),
+            _template(regions=[dict(region, anchor=5)]),
+            _template(regions=[{"x": [0.1, 0.2], "y": [0.1, 0.2]}]),
+            _template(regions=[dict(region, colour="red")]),
+            _template(dimension=[[3840, 2160]]),
+        ]
+        for template in malformed:
+            with self.subTest(template=template), self.assertRaises(ValueError):
+                ocr.check_layout(template)
+
+    def test_set_layouts_checks_before_registering(self):
+        with self.assertRaises(ValueError):
+            ocr.set_layouts([_template(requires="TRANSFER PORTAL")])
+        self.assertEqual(ocr._LAYOUTS, [])
+
+class CompiledLayoutTest(unittest.TestCase):
+    def tearDown(self):
+        ocr.set_layouts([])
+
+    def test_pixel_units_and_tolerances(self):
+        layout = ocr.CompiledLayout(_template(
+            units="pixels", regions=[{"field": "Name", "x": [384, 768], "y": [216, 432]}], tolerances={"mentals_dx": 0.03},
+        ), (3840, 2160))
+        (anchor, table), = layout.tables
+        self.assertIsNone(anchor)
+        self.assertEqual(table.bounds, [("Name", 0.1, 0.2, 0.1, 0.2)])
+        self.assertEqual(layout.tolerances, dict(ocr.DEFAULT_TOLERANCES, mentals_dx=0.03))
+
+    def test_selection_by_size_and_required_lines(self):
+        ocr.set_layouts([
+            _template(name="portal", dimensions=[[3840, 2160]], requires=["TRANSFER PORTAL"]),
+            _template(name="small", dimensions=[[1920, 1080]]),
+        ])
+        portal = _page([("TRANSFER PORTAL", 0.5, 0.5, 0.6, 0.55)])
+        recruiting = _page([("Attributes", 0.5, 0.5, 0.6, 0.55)])
+        small = _page([("TRANSFER PORTAL", 0.5, 0.5, 0.6, 0.55)], 1920, 1080)
+        unknown = _page([], 1000, 1000)
+
+        self.assertEqual(ocr.page_layout(portal).name, "portal")
+        self.assertEqual(ocr.page_layout(recruiting).name, "recruiting")
+        self.assertEqual(ocr.page_layout(small).name, "small")
+        self.assertEqual(ocr.page_layout(unknown).name, "recruiting")
+
+class RegionTableTest(unittest.TestCase):
+    def test_points_on_cell_and_region_edges(self):
+        # Edges that fall exactly on grid cell boundaries, inside a cell and on the envelope
+        bounds = [("A", 0.0, 0.25, 0.0, 0.5), ("B", 0.25, 0.5, 0.5, 1.0), ("C", 0.1, 0.3, 0.45, 0.55)]
+        table = ocr.RegionTable(bounds)
+
+        points = [0.0, 0.1, 0.25, 0.3, 0.45, 0.5, 0.55, 1.0, -0.01, 1.01]
+        points += [value + delta for value in points for delta in (-1e-12, 1e-12)]
+        for x in points:
+            for y in points:
+                expected = [k for k, (_, x_min, x_max, y_min, y_max) in enumerate(bounds) if x_min <= x <= x_max and y_min <= y <= y_max]
+                found = [k for k in table.candidates(x, y) if bounds[k][1] <= x <= bounds[k][2] and bounds[k][3] <= y <= bounds[k][4]]
+                self.assertEqual(found, expected, (x, y))
+
+    def test_empty_and_degenerate_tables(self):
+        self.assertEqual(ocr.RegionTable([]).candidates(0.5, 0.5), [])
+        point = ocr.RegionTable([("A", 0.5, 0.5, 0.5, 0.5)])
+        self.assertEqual(point.candidates(0.5, 0.5), [0])
+        self.assertEqual(point.candidates(0.5, 0.6), [])
+
+    def test_classification_matches_a_linear_scan(self):
+        page = _page([
+            ("AUSTIN", 0.46, 0.16, 0.52, 0.21),
+            ("CANTWELL", 0.46, 0.21, 0.66, 0.25),
+            ("QB", 0.68, 0.18, 0.72, 0.23),
+            ("OUTSIDE", 0.46, 0.16, 0.9, 0.9),
+            ("ON EDGE", 0.75, 0.24, 0.87, 0.30),
+        ])
+        expected = {}
+        for i, text in enumerate(page.text):
+            for field, x_min, x_max, y_min, y_max in ocr.BIO_REGIONS:
+                if all(x_min <= x <= x_max for x in (page.x0[i], page.x2[i])) and all(y_min <= y <= y_max for y in (page.y0[i], page.y2[i])):
+                    expected[field] = text
+        self.assertEqual(ocr.classify_bio_regions([page])[0], expected)
+        self.assertEqual(expected["Hometown"], "ON EDGE")
+
+class AnchoredRegionTest(unittest.TestCase):
+    def setUp(self):
+        ocr.set_layouts([{
+            "name": "portal",
+            "requires": ["TRANSFER PORTAL"],
+            "regions": [
+                {"field": "First Name", "anchor": "TRANSFER PORTAL", "x": [0.0, 0.1], "y": [0.05, 0.1]},
+                {"field": "Position", "x": [0.0, 0.1], "y": [0.9, 1.0]},
+            ],
+        }])
+
+    def tearDown(self):
+        ocr.set_layouts([])
+
+    def test_regions_follow_the_anchor(self):
+        for anchor_x, anchor_y in ((0.1, 0.1), (0.5, 0.3), (0.25, 0.25)):
+            page = _page([
+                ("JOHN", anchor_x + 0.01, anchor_y + 0.06, anchor_x + 0.05, anchor_y + 0.09),
+                ("TRANSFER PORTAL", anchor_x, anchor_y, anchor_x + 0.2, anchor_y + 0.03),
+                ("FAR", anchor_x + 0.01, anchor_y + 0.2, anchor_x + 0.05, anchor_y + 0.25),
+                ("QB", 0.02, 0.92, 0.05, 0.95),
+            ])
+            self.assertEqual(ocr.classify_bio_regions([page])[0], {"First Name": "JOHN", "Position": "QB"})
+
+    def test_tables_are_compiled_once(self):
+        first = _page([("TRANSFER PORTAL", 0.1, 0.1, 0.2, 0.12)])
+        second = _page([("TRANSFER PORTAL", 0.4, 0.2, 0.5, 0.22)])
+        tables = [ocr.page_layout(page).region_tables(page) for page in (first, second)]
+        self.assertEqual([table for table, _, _ in tables[0]], [table for table, _, _ in tables[1]])
+        self.assertEqual([offset[1:] for offset in tables[1]], [(0.4, 0.2), (0.0, 0.0)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""Round-trips OCR results through the pack archive codec (ocr_pack)."""
+
+import glob
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+
+import ocr
+import ocr_pack
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "json")
+
+# Every PageIndex attribute the codec stores
+PAGE_FIELDS = ("page_number", "dimensions", "text", "anchors", "x0", "x1", "x2", "x3", "y0", "y2", "cx", "cy", "by_y")
+
+def _sample_paths():
+    return sorted(glob.glob(os.path.join(SAMPLE_DIR, "*.json")))[:5]
+
+def _page_fields(page):
+    return {name: getattr(page, name) for name in PAGE_FIELDS}
+
+class PackCodecTest(unittest.TestCase):
+    def assertSamePages(self, decoded, expected):
+        self.assertEqual([_page_fields(page) for page in decoded], [_page_fields(page) for page in expected])
+
+    def test_document_round_trip(self):
+        for file_path in _sample_paths():
+            pages = ocr.load_page_indexes(file_path)
+            self.assertSamePages(ocr_pack.decode_document(ocr_pack.encode_document(pages)), pages)
+
+    def test_edge_pages(self):
+        empty = ocr.PageIndex()
+        empty.finish()
+
+        unicode_page = ocr.PageIndex(7, {"width": 1920.0, "height": 1080.0, "unit": "PIXEL"})
+        unicode_page.add_line("Dunçanville, TX – 6' 3\"", 0.1, 0.2, 0.3, 0.3, 0.25, 0.1)
+        unicode_page.add_line("", 0.5, 0.1, 0.6, 0.6, 0.15, 0.5)
+        unicode_page.add_line("Dunçanville, TX – 6' 3\"", 0.1, 0.05, 0.3, 0.3, 0.08, 0.1)
+        unicode_page.finish()
+
+        pages = [empty, unicode_page]
+        self.assertSamePages(ocr_pack.decode_document(ocr_pack.encode_document(pages)), pages)
+        self.assertEqual(ocr_pack.decode_document(ocr_pack.encode_document([])), [])
+
+    def test_rejects_nul_in_text(self):
+        page = ocr.PageIndex()
+        page.add_line("A\0B", 0, 0, 0, 0, 0, 0)
+        page.finish()
+        with self.assertRaises(ValueError):
+            ocr_pack.encode_page(page)
+
+class PackArchiveTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.folder = os.path.join(self.directory, "json")
+        os.mkdir(self.folder)
+        for file_path in _sample_paths()[:3]:
+            shutil.copy(file_path, self.folder)
+        self.pack_path = os.path.join(self.directory, "results.pack")
+
+    def tearDown(self):
+        for reader in list(ocr_pack._READERS.values()):
+            reader[1].close()
+        ocr_pack._READERS.clear()
+        shutil.rmtree(self.directory)
+
+    def test_pack_folder_matches_json(self):
+        self.assertEqual(ocr_pack.pack_folder(self.folder, self.pack_path), (3, 0, []))
+
+        with ocr_pack.PackReader(self.pack_path) as reader:
+            self.assertEqual(reader.names(), sorted(os.listdir(self.folder)))
+            for name in reader.names():
+                file_path = os.path.join(self.folder, name)
+                with open(file_path, "rb") as f:
+                    self.assertEqual(reader.find_sha256(hashlib.sha256(f.read()).hexdigest()), name)
+                self.assertSamePages(reader[name], ocr.load_page_indexes(file_path))
+
+        for name in sorted(os.listdir(self.folder)):
+            packed = ocr_pack.process_packed_document(self.pack_path, name)
+            direct = ocr.process_json_file(os.path.join(self.folder, name))
+            self.assertEqual([result["row"] for result in packed], [result["row"] for result in direct])
+
+    assertSamePages = PackCodecTest.assertSamePages
+
+    def test_repack_reuses_unchanged_documents(self):
+        ocr_pack.pack_folder(self.folder, self.pack_path)
+        self.assertEqual(ocr_pack.pack_folder(self.folder, self.pack_path), (3, 3, []))
+
+    def test_cached_reader_follows_repack(self):
+        ocr_pack.pack_folder(self.folder, self.pack_path)
+        first = sorted(os.listdir(self.folder))[0]
+        ocr_pack.process_packed_document(self.pack_path, first)
+
+        # A new document shifts nothing but must be readable through the cached reader
+        new_path = _sample_paths()[3]
+        shutil.copy(new_path, self.folder)
+        ocr_pack.pack_folder(self.folder, self.pack_path)
+
+        results = ocr_pack.process_packed_document(self.pack_path, os.path.basename(new_path))
+        self.assertIsNone(results[0]["error"])
+
+    def test_unreadable_archives(self):
+        ocr_pack.pack_folder(self.folder, self.pack_path)
+        with open(self.pack_path, "rb") as f:
+            raw = f.read()
+
+        broken_path = os.path.join(self.directory, "broken.pack")
+        for broken in (b"", ocr_pack.PACK_MAGIC, b"NOTAPACK" + raw[8:], raw[:-10]):
+            with open(broken_path, "wb") as f:
+                f.write(broken)
+            with self.assertRaises(ocr_pack.PackError):
+                ocr_pack.PackReader(broken_path).close()
+
+        self.assertFalse(ocr_pack.is_pack(os.path.join(self.folder, sorted(os.listdir(self.folder))[0])))
+        self.assertTrue(ocr_pack.is_pack(self.pack_path))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+"""Feeds canned responses to ocr_submit's HTTP/1.1 response parser."""
+
+import argparse
+import asyncio
+import unittest
+
+import ocr_submit
+
+def _parse(raw):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(raw)
+        reader.feed_eof()
+        return await ocr_submit._read_response(reader)
+    return asyncio.run(run())
+
+class ReadResponseTest(unittest.TestCase):
+    def test_content_length(self):
+        status, headers, body, keep_alive = _parse(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 7\r\n\r\n{\"a\":1}extra")
+        self.assertEqual((status, body, keep_alive), (200, b'{"a":1}', True))
+        self.assertEqual(headers["content-type"], "application/json")
+
+    def test_header_names_are_case_insensitive(self):
+        status, headers, body, _ = _parse(b"HTTP/1.1 429 Too Many Requests\r\nretry-AFTER:  3 \r\ncontent-length: 0\r\n\r\n")
+        self.assertEqual((status, headers["retry-after"], body), (429, "3", b""))
+
+    def test_chunked(self):
+        raw = b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n4;ext=1\r\nWiki\r\n5\r\npedia\r\n0\r\n\r\n"
+        self.assertEqual(_parse(raw)[2], b"Wikipedia")
+
+    def test_chunked_with_trailers(self):
+        async def run():
+            reader = asyncio.StreamReader()
+            reader.feed_data(b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n2\r\nok\r\n0\r\nX-Checksum: 1\r\n\r\nHTTP/1.1 204 No Content\r\nContent-Length: 0\r\n\r\n")
+            reader.feed_eof()
+            first = await ocr_submit._read_response(reader)
+            second = await ocr_submit._read_response(reader)
+            return first, second
+        first, second = asyncio.run(run())
+        self.assertEqual(first[2], b"ok")
+        self.assertEqual(second[0], 204)
+
+    def test_body_until_close(self):
+        status, _, body, keep_alive = _parse(b"HTTP/1.1 200 OK\r\n\r\nall of it")
+        self.assertEqual((status, body, keep_alive), (200, b"all of it", False))
+
+    def test_connection_close(self):
+        self.assertFalse(_parse(b"HTTP/1.1 200 OK\r\nConnection: close\r\nContent-Length: 0\r\n\r\n")[3])
+
+    def test_http_1_0(self):
+        self.assertFalse(_parse(b"HTTP/1.0 200 OK\r\nContent-Length: 0\r\n\r\n")[3])
+        self.assertTrue(_parse(b"HTTP/1.0 200 OK\r\nConnection: keep-alive\r\nContent-Length: 0\r\n\r\n")[3])
+
+    def test_bare_newlines(self):
+        self.assertEqual(_parse(b"HTTP/1.1 200 OK\nContent-Length: 2\n\nok")[2], b"ok")
+
+    def test_closed_connection(self):
+        with self.assertRaises(ConnectionResetError):
+            _parse(b"")
+
+    def test_truncated_body(self):
+        with self.assertRaises(asyncio.IncompleteReadError):
+            _parse(b"HTTP/1.1 200 OK\r\nContent-Length: 10\r\n\r\nshort")
+        with self.assertRaises(asyncio.IncompleteReadError):
+            _parse(b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n10\r\nshort")
+
+    def test_malformed(self):
+        for raw in (b"garbage\r\n\r\n", b"HTTP/1.1 OK\r\n\r\n", b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\nzz\r\n"):
+            with self.assertRaises(ConnectionError):
+                _parse(raw)
+
+class ArgumentsTest(unittest.TestCase):
+    def test_parse_header(self):
+        self.assertEqual(ocr_submit.parse_header("Authorization: Signature a:b "), ("Authorization", "Signature a:b"))
+        for value in ("bogus", ": value", "X-A: b\r\nX-B: c"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                ocr_submit.parse_header(value)
+
+    def test_duplicate_result_names(self):
+        self.assertEqual(ocr_submit.duplicate_result_names(["a/x.png", "b/x.jpg", "y.png"]), ["x.json"])
+        self.assertEqual(ocr_submit.duplicate_result_names(["a/x.png", "a/y.png"]), [])
+
+if __name__ == "__main__":
+    unittest.main()